@@ -3,7 +3,8 @@ from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel
 from db_manager import StudentDataManager
 from models import User as UserModel  # Переименовываем для избежания конфликта
-import secrets
+from session_store import SessionStore, create_session_store
+from credential_cache import CredentialCache
 
 # Инициализация приложения
 app = FastAPI()
@@ -58,11 +59,23 @@ class UserResponse(BaseModel):
 def get_db():
     return db_manager
 
-# Хранилище активных сессий (в реальном приложении используйте Redis или БД)
-active_sessions = {}
+# Хранилище сессий с TTL: в Redis, если задан SESSION_REDIS_URL (нужно при
+# нескольких процессах uvicorn), иначе в памяти процесса
+session_store = create_session_store()
+
+# Кеш проверенных логинов и паролей: без чтения пользователя из БД на каждом запросе
+credential_cache = CredentialCache()
+
+# Dependency для хранилища сессий
+def get_sessions():
+    return session_store
 
 # Функция для аутентификации пользователя
 def authenticate_user(credentials: HTTPBasicCredentials = Depends(security), db: StudentDataManager = Depends(get_db)):
+    user_id = credential_cache.get(credentials.username, credentials.password)
+    if user_id is not None:
+        return UserModel(id=user_id, username=credentials.username)
+
     user = db.get_user_by_username(credentials.username)
     if not user or user.password != credentials.password:
         raise HTTPException(
@@ -70,16 +83,20 @@ def authenticate_user(credentials: HTTPBasicCredentials = Depends(security), db:
             detail="Неверное имя пользователя или пароль",
             headers={"WWW-Authenticate": "Basic"},
         )
+    credential_cache.put(user.username, credentials.password, user.id)
     return user
 
-# Функция для проверки активной сессии
-def get_current_user(session_token: str = Depends(security)):
-    if session_token not in active_sessions:
+# Функция для проверки активной сессии: токен передаётся вместо имени пользователя.
+# Пользователь восстанавливается из записи сессии, без обращения к БД
+def get_current_user(credentials: HTTPBasicCredentials = Depends(security),
+                     sessions: SessionStore = Depends(get_sessions)):
+    session = sessions.get(credentials.username)
+    if session is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Недействительная сессия",
         )
-    return active_sessions[session_token]
+    return UserModel(id=session["user_id"], username=session["username"])
 
 # Эндпоинты аутентификации
 @app.post("/auth/register", response_model=UserResponse, status_code=201)
@@ -92,15 +109,17 @@ def register_user(user: UserCreate, db: StudentDataManager = Depends(get_db)):
         
         # Создаем нового пользователя
         new_user = db.create_user(user.username, user.password)
+        # Сбрасываем записи прежнего пользователя с тем же именем
+        credential_cache.invalidate(user.username)
         return new_user
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/auth/login")
-def login_user(user: UserModel = Depends(authenticate_user)):  # Используем переименованную модель
-    # Создаем сессионный токен
-    session_token = secrets.token_urlsafe(32)
-    active_sessions[session_token] = user
+def login_user(user: UserModel = Depends(authenticate_user),  # Используем переименованную модель
+               sessions: SessionStore = Depends(get_sessions)):
+    # Создаем сессию с ограниченным временем жизни
+    session_token = sessions.create(user.id, user.username)
     
     return {
         "message": "Успешный вход в систему",
@@ -110,9 +129,10 @@ def login_user(user: UserModel = Depends(authenticate_user)):  # Использ
     }
 
 @app.post("/auth/logout")
-def logout_user(current_user: UserModel = Depends(get_current_user), session_token: str = Depends(security)):
-    if session_token in active_sessions:
-        del active_sessions[session_token]
+def logout_user(current_user: UserModel = Depends(get_current_user),
+                credentials: HTTPBasicCredentials = Depends(security),
+                sessions: SessionStore = Depends(get_sessions)):
+    sessions.delete(credentials.username)
     
     return {"message": "Успешный выход из системы"}
 
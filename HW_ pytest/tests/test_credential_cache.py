@@ -0,0 +1,97 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPBasicCredentials
+import sys
+import os
+
+# Добавляем корневую директорию в PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from credential_cache import CredentialCache
+from db_manager import StudentDataManager
+
+class CountingDataManager(StudentDataManager):
+    """Менеджер БД, считающий чтения пользователей"""
+    def __init__(self, db_url):
+        super().__init__(db_url)
+        self.user_reads = 0
+
+    def get_user_by_username(self, username):
+        self.user_reads += 1
+        return super().get_user_by_username(username)
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = CredentialCache(max_size=2, ttl=60)
+    monkeypatch.setattr(main, "credential_cache", cache)
+    return cache
+
+@pytest.fixture
+def db(tmp_path):
+    db = CountingDataManager(f"sqlite:///{tmp_path / 'test_credentials.db'}")
+    db.create_user("cached_user", "secret123")
+    return db
+
+class TestCredentialCache:
+    """Тесты кеша проверенных учётных данных"""
+
+    def test_repeated_auth_skips_db(self, cache, db):
+        """Повторная проверка того же логина и пароля не обращается к БД"""
+        credentials = HTTPBasicCredentials(username="cached_user", password="secret123")
+
+        first = main.authenticate_user(credentials, db)
+        second = main.authenticate_user(credentials, db)
+
+        assert db.user_reads == 1
+        assert (second.id, second.username) == (first.id, first.username)
+
+    def test_wrong_password_not_served_from_cache(self, cache, db):
+        """Неверный пароль для закешированного пользователя проверяется по БД и отклоняется"""
+        main.authenticate_user(HTTPBasicCredentials(username="cached_user", password="secret123"), db)
+
+        with pytest.raises(HTTPException) as error:
+            main.authenticate_user(HTTPBasicCredentials(username="cached_user", password="wrong"), db)
+
+        assert error.value.status_code == 401
+        assert db.user_reads == 2
+
+    def test_password_not_stored(self, cache):
+        """В кеше хранится хеш, а не пароль"""
+        cache.put("user", "secret123", 1)
+
+        assert b"secret123" not in repr(cache.entries).encode()
+        assert cache.get("user", "secret123") == 1
+        assert cache.get("user", "secret124") is None
+
+    def test_entries_expire(self, cache, monkeypatch):
+        import credential_cache
+        now = [1000.0]
+        monkeypatch.setattr(credential_cache.time, "monotonic", lambda: now[0])
+        cache.put("user", "secret123", 1)
+        now[0] += 61
+
+        assert cache.get("user", "secret123") is None
+        assert len(cache) == 0
+
+    def test_cache_is_bounded(self, cache):
+        """При переполнении вытесняется давно не использованная запись"""
+        cache.put("first", "p", 1)
+        cache.put("second", "p", 2)
+        cache.get("first", "p")
+        cache.put("third", "p", 3)
+
+        assert len(cache) == 2
+        assert cache.get("second", "p") is None
+        assert cache.get("first", "p") == 1
+
+    def test_invalidate(self, cache):
+        cache.put("first", "p", 1)
+        cache.put("second", "p", 2)
+
+        cache.invalidate("first")
+        assert cache.get("first", "p") is None
+        assert cache.get("second", "p") == 2
+
+        cache.invalidate()
+        assert len(cache) == 0
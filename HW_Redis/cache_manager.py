@@ -0,0 +1,276 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Время жизни записей кеша, секунды
+CACHE_TTL = 300
+# Префикс ключей кеша студентов
+CACHE_PREFIX = "students"
+# Размер и время жизни записей локального кеша процесса
+LOCAL_CACHE_SIZE = 1024
+LOCAL_CACHE_TTL = 5
+# Как долго поток подписки ждёт сообщение за один вызов, секунды
+PUBSUB_POLL_TIMEOUT = 1.0
+# Порядок полей студента в сериализованной записи
+STUDENT_FIELDS = ("id", "last_name", "first_name", "faculty", "course", "grade")
+
+def serialize_students(students: List[Dict[str, Any]]) -> str:
+    """
+    Компактная сериализация: список массивов значений в порядке STUDENT_FIELDS,
+    без имён полей и пробелов.
+    """
+    rows = [[student[field] for field in STUDENT_FIELDS] for student in students]
+    return json.dumps(rows, ensure_ascii=False, separators=(',', ':'))
+
+def deserialize_students(data: str) -> List[Dict[str, Any]]:
+    return [dict(zip(STUDENT_FIELDS, row)) for row in json.loads(data)]
+
+def tier_stats(hits: int, misses: int) -> Dict[str, Any]:
+    lookups = hits + misses
+    return {"hits": hits, "misses": misses, "hit_ratio": round(hits / lookups, 4) if lookups else 0.0}
+
+class LocalCache:
+    """
+    LRU-кеш с TTL в памяти процесса (уже десериализованные значения).
+    Записи хранятся вместе с поколением кеша Redis: после сообщения об
+    инвалидации записи старых поколений не принимаются, даже если запрос,
+    прочитавший их из БД, завершится позже сообщения.
+    """
+    def __init__(self, max_size: int = LOCAL_CACHE_SIZE, ttl: float = LOCAL_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: 'OrderedDict[Any, Tuple[float, int, Any]]' = OrderedDict()
+        # Наибольшее поколение, о котором известно процессу
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key) -> Optional[Tuple[int, Any]]:
+        """
+        Возвращает (поколение, значение) или None при промахе.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key, generation: int, value: Any):
+        with self.lock:
+            if generation < self.generation:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, generation, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, generation: Optional[int] = None):
+        """
+        Удаляет все записи; generation - новое поколение из сообщения.
+        """
+        with self.lock:
+            if generation is not None:
+                self.generation = max(self.generation, generation)
+            self.entries.clear()
+
+class StudentCache:
+    """
+    Кеш чтения студентов в Redis (read-through): обработчик сначала ищет
+    данные в кеше, при промахе читает БД и кладёт результат в кеш с TTL.
+    Ошибки Redis не прерывают запрос - они логируются и считаются промахом.
+
+    Ключи записей содержат номер поколения ("students:g<номер>:all"),
+    который хранится в ключе "students:generation". Инвалидация - один
+    атомарный INCR: записи старого поколения больше не читаются и
+    исчезают по TTL, поэтому запись в БД стоит O(1) независимо от
+    размера кеша. Поколение читается до обращения к БД, так что данные,
+    прочитанные до чужой инвалидации, попадают в уже старое поколение.
+
+    Необязательный локальный уровень (LocalCache) стоит перед Redis и
+    отвечает без сетевых запросов. Новое поколение рассылается через
+    pub/sub Redis, и поток, запущенный start_listener, очищает локальный
+    уровень каждого процесса; если сообщение потеряно, устаревание
+    ограничено TTL локального уровня.
+    """
+    def __init__(self, client: redis.Redis, ttl: int = CACHE_TTL, prefix: str = CACHE_PREFIX,
+                 local: Optional[LocalCache] = None):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.local = local
+        self.listener = None
+        # Счётчики уровня Redis (обращения после промаха локального уровня)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def generation_key(self) -> str:
+        return f"{self.prefix}:generation"
+
+    def channel(self) -> str:
+        return f"{self.prefix}:invalidations"
+
+    def _initial_generation(self) -> int:
+        # Если ключа поколения нет (Redis перезапущен или ключ вытеснен), отсчёт
+        # начинается с текущего времени в миллисекундах, чтобы не совпасть
+        # с поколениями, записи которых ещё живы
+        return time.time_ns() // 1_000_000
+
+    def generation(self) -> int:
+        """
+        Текущее поколение кеша.
+        """
+        key = self.generation_key()
+        generation = self.client.get(key)
+        if generation is None:
+            self.client.set(key, self._initial_generation(), nx=True)
+            generation = self.client.get(key)
+        return int(generation)
+
+    def list_key(self, generation: int) -> str:
+        return f"{self.prefix}:g{generation}:all"
+
+    def student_key(self, generation: int, student_id: int) -> str:
+        return f"{self.prefix}:g{generation}:{student_id}"
+
+    def _get(self, local_key, make_key: Callable[[int], str],
+             decode: Callable[[str], Any]) -> Tuple[Optional[int], Any]:
+        """
+        Возвращает (поколение, значение или None). Поколение нужно, чтобы
+        после промаха положить данные из БД в то же поколение; при
+        ошибке Redis оно равно None и класть данные некуда.
+        """
+        if self.local is not None:
+            entry = self.local.get(local_key)
+            if entry is not None:
+                return entry
+        
+        try:
+            generation = self.generation()
+            data = self.client.get(make_key(generation))
+        except redis.RedisError as e:
+            logger.error(f"Ошибка при чтении кеша: {e}")
+            self.errors += 1
+            generation, data = None, None
+        if data is None:
+            self.misses += 1
+            return generation, None
+        
+        self.hits += 1
+        value = decode(data)
+        if self.local is not None:
+            self.local.put(local_key, generation, value)
+        return generation, value
+
+    def _set(self, local_key, key: str, generation: int, value: Any, data: str):
+        try:
+            self.client.set(key, data, ex=self.ttl)
+        except redis.RedisError as e:
+            logger.error(f"Ошибка при сохранении в кеш {key}: {e}")
+            self.errors += 1
+        if self.local is not None:
+            self.local.put(local_key, generation, value)
+
+    def get_students(self) -> Tuple[Optional[int], Optional[List[Dict[str, Any]]]]:
+        """
+        Поколение и список всех студентов из кеша (None при промахе).
+        """
+        return self._get("all", self.list_key, deserialize_students)
+
+    def set_students(self, generation: Optional[int], students: List[Dict[str, Any]]):
+        if generation is not None:
+            self._set("all", self.list_key(generation), generation, students, serialize_students(students))
+
+    def get_student(self, student_id: int) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """
+        Поколение и студент из кеша (None при промахе).
+        """
+        return self._get(student_id, lambda generation: self.student_key(generation, student_id),
+                         lambda data: deserialize_students(data)[0])
+
+    def set_student(self, generation: Optional[int], student: Dict[str, Any]):
+        if generation is not None:
+            self._set(student["id"], self.student_key(generation, student["id"]), generation, student,
+                      serialize_students([student]))
+
+    def invalidate(self) -> Optional[int]:
+        """
+        Делает все записи кеша студентов устаревшими и рассылает новое
+        поколение остальным процессам. Возвращает его или None при ошибке Redis.
+        """
+        if self.local is not None:
+            self.local.invalidate()
+        key = self.generation_key()
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            pipeline.set(key, self._initial_generation(), nx=True)
+            pipeline.incr(key)
+            generation = pipeline.execute()[-1]
+            self.client.publish(self.channel(), generation)
+        except redis.RedisError as e:
+            logger.error(f"Ошибка при инвалидации кеша: {e}")
+            self.errors += 1
+            return None
+        if self.local is not None:
+            self.local.invalidate(generation)
+        return generation
+
+    def _on_invalidation(self, message: Dict[str, Any]):
+        self.local.invalidate(int(message["data"]))
+
+    def _on_listener_error(self, error: Exception, pubsub, thread):
+        # Пока подписка не работает, сообщения теряются: локальным данным доверять нельзя
+        logger.error(f"Ошибка подписки на инвалидации кеша: {error}")
+        self.errors += 1
+        self.local.invalidate()
+        time.sleep(PUBSUB_POLL_TIMEOUT)
+
+    def start_listener(self):
+        """
+        Подписывает процесс на сообщения об инвалидации (фоновый поток).
+        """
+        if self.local is None or self.listener is not None:
+            return
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel(): self._on_invalidation})
+        self.listener = pubsub.run_in_thread(sleep_time=PUBSUB_POLL_TIMEOUT, daemon=True,
+                                             exception_handler=self._on_listener_error)
+
+    def stop_listener(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener.join(timeout=PUBSUB_POLL_TIMEOUT * 2)
+            self.listener = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Счётчики попаданий и промахов этого процесса: общие и по уровням.
+        Промах локального уровня - это обращение к Redis.
+        """
+        tiers = {"redis": tier_stats(self.hits, self.misses)}
+        hits = self.hits
+        if self.local is not None:
+            tiers["local"] = {**tier_stats(self.local.hits, self.local.misses), "size": len(self.local)}
+            hits += self.local.hits
+        return {
+            **tier_stats(hits, self.misses),
+            "errors": self.errors,
+            "tiers": tiers,
+        }
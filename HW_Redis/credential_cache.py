@@ -0,0 +1,81 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Размер кеша (число пользователей) и время жизни записи, секунды
+CREDENTIAL_CACHE_SIZE = 1024
+CREDENTIAL_CACHE_TTL = 60
+
+class CredentialCache:
+    """
+    Кеш проверенных учётных данных: имя пользователя -> (срок, хеш, id).
+    Позволяет не читать пользователя из БД на каждом запросе с логином
+    и паролем.
+
+    Пароль не хранится: запись содержит HMAC-SHA256 от имени и пароля
+    с ключом, случайным для каждого процесса, поэтому содержимое кеша
+    бесполезно за пределами процесса. Кешируются только успешные проверки,
+    неверный пароль всегда проверяется по БД. Изменения пользователя в
+    этом процессе сбрасывают запись методом invalidate; изменения в других
+    процессах видны не позже чем через ttl секунд.
+    """
+    def __init__(self, max_size: int = CREDENTIAL_CACHE_SIZE, ttl: float = CREDENTIAL_CACHE_TTL):
+        if max_size < 1:
+            raise ValueError("Размер кеша должен быть положительным")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: 'OrderedDict[str, Tuple[float, bytes, int]]' = OrderedDict()
+        self.secret = secrets.token_bytes(32)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def digest(self, username: str, password: str) -> bytes:
+        return hmac.new(self.secret, username.encode('utf-8') + b'\0' + password.encode('utf-8'),
+                        hashlib.sha256).digest()
+
+    def get(self, username: str, password: str) -> Optional[int]:
+        """
+        id пользователя, если пара уже проверялась и запись не истекла, иначе None.
+        """
+        digest = self.digest(username, password)
+        with self.lock:
+            entry = self.entries.get(username)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self.entries[username]
+                entry = None
+            if entry is None or not hmac.compare_digest(entry[1], digest):
+                self.misses += 1
+                return None
+            self.entries.move_to_end(username)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, username: str, password: str, user_id: int):
+        """
+        Запоминает учётные данные, успешно проверенные по БД.
+        """
+        digest = self.digest(username, password)
+        with self.lock:
+            self.entries[username] = (time.monotonic() + self.ttl, digest, user_id)
+            self.entries.move_to_end(username)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, username: Optional[str] = None):
+        """
+        Удаляет запись пользователя (или все записи, если username не задан).
+        """
+        with self.lock:
+            if username is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(username, None)
@@ -2,8 +2,10 @@ from fastapi import FastAPI, HTTPException, Depends, status, BackgroundTasks
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel
 from db_manager import StudentDataManager
+from cache_manager import LocalCache, StudentCache
+from credential_cache import CredentialCache
+from session_store import RedisSessionStore, SessionStore
 from models import User as UserModel, Student
-import secrets
 import asyncio
 from typing import Dict, Any, List
 import uuid
@@ -33,6 +35,15 @@ db_manager = StudentDataManager(DATABASE_URL)
 # Инициализация Redis
 redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
 
+# Кеш чтения студентов: локальный уровень процесса перед Redis
+student_cache = StudentCache(redis_client, local=LocalCache())
+
+# Сессии в Redis с TTL: общие для всех процессов uvicorn
+session_store = RedisSessionStore(redis_client)
+
+# Кеш проверенных логинов и паролей: без чтения пользователя из БД на каждом запросе
+credential_cache = CredentialCache()
+
 # Настройка базовой аутентификации
 security = HTTPBasic()
 
@@ -86,18 +97,52 @@ def get_db():
 def get_redis():
     return redis_client
 
-# Хранилище активных сессий и статусов задач
-active_sessions: Dict[str, Dict[str, Any]] = {}
+# Dependency для кеша студентов
+def get_cache():
+    return student_cache
+
+# Dependency для хранилища сессий
+def get_sessions():
+    return session_store
+
+def to_response(student) -> StudentResponse:
+    return StudentResponse(
+        id=student.id,
+        last_name=student.last_name,
+        first_name=student.first_name,
+        faculty=student.faculty,
+        course=student.course,
+        grade=student.grade
+    )
+
+# Хранилище статусов задач
 background_tasks: Dict[str, Dict[str, Any]] = {}
 
+@app.on_event("startup")
+def start_cache_listener():
+    """Подписка на инвалидации кеша от других процессов"""
+    try:
+        student_cache.start_listener()
+    except redis.RedisError as e:
+        logger.error(f"Не удалось подписаться на инвалидации кеша: {e}")
+
+@app.on_event("shutdown")
+def stop_cache_listener():
+    student_cache.stop_listener()
+
 # Функция для аутентификации пользователя по сессионному токену
 def authenticate_by_token(token: str) -> UserModel:
-    """Аутентификация по сессионному токену"""
-    if token in active_sessions:
-        user_data = active_sessions[token]
-        user = db_manager.get_user_by_id(user_data["user_id"])
-        if user:
-            return user
+    """
+    Аутентификация по сессионному токену. Пользователь восстанавливается
+    из записи сессии, без обращения к БД.
+    """
+    try:
+        session = session_store.get(token)
+    except redis.RedisError as e:
+        logger.error(f"Ошибка при чтении сессии: {e}")
+        return None
+    if session is not None:
+        return UserModel(id=session["user_id"], username=session["username"])
     return None
 
 # Основная функция аутентификации
@@ -111,7 +156,11 @@ def authenticate_user(credentials: HTTPBasicCredentials = Depends(security), db:
             logger.info("Аутентификация по сессионному токену успешна")
             return user
         
-        # Если не сработало, пробуем по логину/паролю
+        # Если не сработало, пробуем по логину/паролю: сначала в кеше проверенных
+        user_id = credential_cache.get(credentials.username, credentials.password)
+        if user_id is not None:
+            return UserModel(id=user_id, username=credentials.username)
+        
         user = db.get_user_by_username(credentials.username)
         if not user:
             logger.warning("Пользователь не найден")
@@ -128,6 +177,7 @@ def authenticate_user(credentials: HTTPBasicCredentials = Depends(security), db:
             )
             
         logger.info("Аутентификация по логину/паролю успешна")
+        credential_cache.put(user.username, credentials.password, user.id)
         return user
         
     except HTTPException:
@@ -142,13 +192,9 @@ def authenticate_user(credentials: HTTPBasicCredentials = Depends(security), db:
 # Функция для инвалидации кеша
 def invalidate_students_cache():
     """Удаляет все кешированные данные о студентах"""
-    try:
-        keys = redis_client.keys("students:*")
-        if keys:
-            redis_client.delete(*keys)
-            logger.info(f"Инвалидирован кеш: {len(keys)} ключей")
-    except Exception as e:
-        logger.error(f"Ошибка при инвалидации кеша: {e}")
+    generation = student_cache.invalidate()
+    if generation is not None:
+        logger.info(f"Инвалидирован кеш, новое поколение: {generation}")
 
 # Фоновые задачи
 async def load_csv_background(task_id: str, csv_file_path: str, db: StudentDataManager):
@@ -245,6 +291,8 @@ def register_user(user: UserCreate, db: StudentDataManager = Depends(get_db)):
             logger.warning("Пользователь уже существует")
             raise HTTPException(status_code=400, detail="Пользователь с таким именем уже существует")
         
+        # Сбрасываем записи прежнего пользователя с тем же именем
+        credential_cache.invalidate(new_user.username)
         logger.info(f"Пользователь создан: {new_user.id}")
         return UserResponse(id=new_user.id, username=new_user.username)
         
@@ -255,17 +303,10 @@ def register_user(user: UserCreate, db: StudentDataManager = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Ошибка сервера: {str(e)}")
 
 @app.post("/auth/login")
-def login_user(user: UserModel = Depends(authenticate_user)):
+def login_user(user: UserModel = Depends(authenticate_user), sessions: SessionStore = Depends(get_sessions)):
     try:
-        # Создаем сессионный токен
-        session_token = secrets.token_urlsafe(32)
-        
-        # Сохраняем информацию о сессии
-        active_sessions[session_token] = {
-            "user_id": user.id,
-            "username": user.username,
-            "created_at": time.time()
-        }
+        # Создаем сессию с ограниченным временем жизни
+        session_token = sessions.create(user.id, user.username)
         
         logger.info(f"Успешный вход, создана сессия: {session_token}")
         
@@ -280,10 +321,9 @@ def login_user(user: UserModel = Depends(authenticate_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/auth/logout")
-def logout_user(credentials: HTTPBasicCredentials = Depends(security)):
+def logout_user(credentials: HTTPBasicCredentials = Depends(security), sessions: SessionStore = Depends(get_sessions)):
     session_token = credentials.username
-    if session_token in active_sessions:
-        del active_sessions[session_token]
+    if sessions.delete(session_token):
         logger.info(f"Пользователь вышел из системы: {session_token}")
         return {"message": "Успешный выход из системы"}
     else:
@@ -403,43 +443,20 @@ def create_student(
 @app.get("/students/", response_model=list[StudentResponse])
 def read_students(
     db: StudentDataManager = Depends(get_db),
-    redis_client: redis.Redis = Depends(get_redis),
+    cache: StudentCache = Depends(get_cache),
     current_user: UserModel = Depends(authenticate_user)
 ):
-    cache_key = "students:all"
-    
-    try:
-        # Пробуем получить данные из кеша
-        cached_data = redis_client.get(cache_key)
-        if cached_data:
-            logger.info("Данные получены из кеша")
-            # Здесь нужно реализовать десериализацию, например, используя json.loads
-            # Для простоты пока пропустим и всегда будем получать из БД
-            pass
-    except Exception as e:
-        logger.error(f"Ошибка при работе с Redis: {e}")
+    # Пробуем получить данные из кеша
+    generation, cached_students = cache.get_students()
+    if cached_students is not None:
+        logger.info("Данные получены из кеша")
+        return [StudentResponse(**student) for student in cached_students]
     
     # Получаем данные из БД
-    students = db.select_all_students()
-    result = [
-        StudentResponse(
-            id=student.id,
-            last_name=student.last_name,
-            first_name=student.first_name,
-            faculty=student.faculty,
-            course=student.course,
-            grade=student.grade
-        )
-        for student in students
-    ]
+    result = [to_response(student) for student in db.select_all_students()]
     
-    try:
-        # Сохраняем в кеш на 5 минут
-        # Здесь нужно реализовать сериализацию, например, используя json.dumps
-        # redis_client.setex(cache_key, 300, serialized_data)
-        pass
-    except Exception as e:
-        logger.error(f"Ошибка при сохранении в кеш: {e}")
+    # Сохраняем в кеш на CACHE_TTL секунд
+    cache.set_students(generation, [student.model_dump() for student in result])
     
     return result
 
@@ -447,24 +464,28 @@ def read_students(
 def read_student(
     student_id: int, 
     db: StudentDataManager = Depends(get_db),
-    redis_client: redis.Redis = Depends(get_redis),
+    cache: StudentCache = Depends(get_cache),
     current_user: UserModel = Depends(authenticate_user)
 ):
-    cache_key = f"students:{student_id}"
-    
-    # Здесь также можно добавить логику кеширования для отдельного студента
+    generation, cached_student = cache.get_student(student_id)
+    if cached_student is not None:
+        return StudentResponse(**cached_student)
     
     student = db.get_student(student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Студент не найден")
-    return StudentResponse(
-        id=student.id,
-        last_name=student.last_name,
-        first_name=student.first_name,
-        faculty=student.faculty,
-        course=student.course,
-        grade=student.grade
-    )
+    
+    result = to_response(student)
+    cache.set_student(generation, result.model_dump())
+    return result
+
+@app.get("/cache/stats")
+def cache_stats(
+    cache: StudentCache = Depends(get_cache),
+    current_user: UserModel = Depends(authenticate_user)
+):
+    """Попадания и промахи кеша в этом процессе, общие и по уровням"""
+    return cache.stats()
 
 # Корневой эндпоинт
 @app.get("/")
@@ -479,11 +500,11 @@ def check_auth(current_user: UserModel = Depends(authenticate_user)):
         "username": current_user.username
     }
 
-# Эндпоинт для отладки - показывает активные сессии
+# Эндпоинт для отладки - показывает число активных сессий
 @app.get("/auth/debug-sessions")
-def debug_sessions(current_user: UserModel = Depends(authenticate_user)):
+def debug_sessions(current_user: UserModel = Depends(authenticate_user), sessions: SessionStore = Depends(get_sessions)):
     return {
-        "active_sessions": active_sessions,
+        "active_sessions": sessions.count(),
         "current_user": {
             "id": current_user.id,
             "username": current_user.username
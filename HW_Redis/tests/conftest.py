@@ -0,0 +1,56 @@
+import pytest
+import os
+import sys
+
+import fakeredis
+
+# Добавляем корневую директорию в PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_manager import LocalCache, StudentCache
+from credential_cache import CredentialCache
+from db_manager import StudentDataManager
+from session_store import RedisSessionStore
+
+class CountingDataManager(StudentDataManager):
+    """Менеджер БД, считающий чтения студентов"""
+    def __init__(self, db_url):
+        super().__init__(db_url)
+        self.reads = 0
+
+    def select_all_students(self):
+        self.reads += 1
+        return super().select_all_students()
+
+    def get_student(self, student_id):
+        self.reads += 1
+        return super().get_student(student_id)
+
+@pytest.fixture
+def redis_server():
+    """Сервер Redis в памяти процесса; connected = False имитирует его недоступность"""
+    return fakeredis.FakeServer()
+
+@pytest.fixture
+def fake_redis(redis_server):
+    return fakeredis.FakeRedis(server=redis_server, decode_responses=True)
+
+@pytest.fixture
+def test_db(tmp_path):
+    """Отдельная база данных для каждого теста"""
+    db = CountingDataManager(f"sqlite:///{tmp_path / 'test_students.db'}")
+    db.create_user("cache_user", "cachepass")
+    return db
+
+@pytest.fixture
+def test_client(monkeypatch, fake_redis, test_db):
+    """Тестовый клиент с кешем и сессиями в fakeredis и тестовой базой"""
+    import main
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(main, "student_cache", StudentCache(fake_redis, local=LocalCache()))
+    monkeypatch.setattr(main, "session_store", RedisSessionStore(fake_redis))
+    monkeypatch.setattr(main, "credential_cache", CredentialCache())
+    main.app.dependency_overrides[main.get_db] = lambda: test_db
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
@@ -0,0 +1,96 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from session_store import InMemorySessionStore, RedisSessionStore, SessionStore, create_session_store
+
+AUTH = ("cache_user", "cachepass")
+
+class TestSessionStore:
+    """Тесты хранилищ сессий"""
+
+    @pytest.fixture(params=["memory", "redis"])
+    def store(self, request, fake_redis):
+        if request.param == "memory":
+            return InMemorySessionStore(ttl=60)
+        return RedisSessionStore(fake_redis, ttl=60)
+
+    def test_create_get_delete(self, store):
+        """Сессия хранит пользователя до удаления"""
+        token = store.create(7, "student")
+
+        session = store.get(token)
+        assert session["user_id"] == 7
+        assert session["username"] == "student"
+        assert store.count() == 1
+
+        assert store.delete(token)
+        assert store.get(token) is None
+        assert not store.delete(token)
+        assert store.count() == 0
+
+    def test_unknown_token(self, store):
+        assert store.get("unknown") is None
+
+    def test_redis_sessions_have_ttl(self, fake_redis):
+        """Сессии в Redis сохраняются с временем жизни"""
+        store = RedisSessionStore(fake_redis, ttl=60)
+        token = store.create(1, "student")
+
+        assert 0 < fake_redis.ttl(store.key(token)) <= 60
+
+    def test_redis_sessions_shared_between_workers(self, redis_server):
+        """Сессия, созданная одним процессом, видна другому"""
+        import fakeredis
+        first = RedisSessionStore(fakeredis.FakeRedis(server=redis_server, decode_responses=True))
+        second = RedisSessionStore(fakeredis.FakeRedis(server=redis_server, decode_responses=True))
+
+        token = first.create(1, "student")
+
+        assert second.get(token)["username"] == "student"
+
+    def test_memory_sessions_expire(self, monkeypatch):
+        """Истёкшие сессии удаляются из памяти при следующем обращении"""
+        import session_store
+        now = [1000.0]
+        monkeypatch.setattr(session_store.time, "monotonic", lambda: now[0])
+        store = InMemorySessionStore(ttl=10)
+        expired = store.create(1, "first")
+        now[0] += 5
+        alive = store.create(2, "second")
+        now[0] += 6
+
+        assert store.get(expired) is None
+        assert store.get(alive)["username"] == "second"
+        assert len(store.sessions) == 1
+        assert len(store.expirations) == 1
+
+    def test_base_is_abstract(self):
+        with pytest.raises(TypeError):
+            SessionStore()
+
+    def test_factory(self, monkeypatch):
+        """Без SESSION_REDIS_URL сессии хранятся в памяти"""
+        monkeypatch.delenv("SESSION_REDIS_URL", raising=False)
+
+        assert isinstance(create_session_store(), InMemorySessionStore)
+        assert isinstance(create_session_store("redis://localhost:6379/0"), RedisSessionStore)
+
+    def test_token_auth_skips_db(self, test_client: TestClient, test_db, monkeypatch):
+        """Аутентификация по токену не обращается к БД"""
+        token = test_client.post("/auth/login", auth=AUTH).json()["session_token"]
+
+        def fail(*args, **kwargs):
+            raise AssertionError("обращение к БД")
+        monkeypatch.setattr(test_db, "get_user_by_username", fail)
+        monkeypatch.setattr(test_db, "get_user_by_id", fail)
+
+        response = test_client.get("/auth/check", auth=(token, ""))
+        assert response.status_code == 200
+        assert response.json()["username"] == "cache_user"
+
+    def test_logout_ends_session(self, test_client: TestClient):
+        token = test_client.post("/auth/login", auth=AUTH).json()["session_token"]
+
+        assert test_client.post("/auth/logout", auth=(token, "")).status_code == 200
+        assert test_client.get("/auth/check", auth=(token, "")).status_code == 401
+        assert test_client.post("/auth/logout", auth=(token, "")).status_code == 400
@@ -0,0 +1,181 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from cache_manager import LocalCache, StudentCache, deserialize_students, serialize_students
+from models import Student
+
+AUTH = ("cache_user", "cachepass")
+
+def add_student(db, last_name="Иванов", grade=85.5):
+    return db.insert_student(Student(last_name=last_name, first_name="Петр", faculty="ФТФ",
+                                     course="Физика", grade=grade))
+
+class TestStudentCache:
+    """Тесты кеша студентов"""
+
+    def test_serialization_roundtrip(self):
+        """Компактная сериализация без имён полей сохраняет данные"""
+        students = [{"id": 1, "last_name": "Иванов", "first_name": "Петр",
+                     "faculty": "ФТФ", "course": "Физика", "grade": 85.5}]
+        data = serialize_students(students)
+
+        assert "last_name" not in data
+        assert "Иванов" in data
+        assert deserialize_students(data) == students
+
+    def test_entries_have_ttl(self, fake_redis):
+        """Записи кеша сохраняются с временем жизни"""
+        cache = StudentCache(fake_redis, ttl=60)
+        generation, _ = cache.get_students()
+        cache.set_students(generation, [])
+
+        assert 0 < fake_redis.ttl(cache.list_key(generation)) <= 60
+
+    def test_invalidate_bumps_generation(self, fake_redis):
+        """Инвалидация меняет поколение, не удаляя ключи: старые записи больше не читаются"""
+        cache = StudentCache(fake_redis)
+        generation, _ = cache.get_students()
+        cache.set_students(generation, [])
+        keys_before = set(fake_redis.keys())
+
+        assert cache.invalidate() == generation + 1
+        assert set(fake_redis.keys()) == keys_before
+        assert cache.get_students() == (generation + 1, None)
+
+    def test_generation_survives_key_loss(self, fake_redis):
+        """После потери ключа поколения записи старых поколений не читаются"""
+        cache = StudentCache(fake_redis)
+        fake_redis.set(cache.generation_key(), 1)
+        cache.set_students(2, [])
+        fake_redis.delete(cache.generation_key())
+
+        cache.invalidate()
+
+        assert cache.generation() > 2
+
+    def test_list_read_through(self, test_client: TestClient, test_db):
+        """Повторное чтение списка обслуживается из кеша без обращения к БД"""
+        add_student(test_db)
+
+        first = test_client.get("/students/", auth=AUTH)
+        second = test_client.get("/students/", auth=AUTH)
+
+        assert first.status_code == 200
+        assert second.json() == first.json()
+        assert test_db.reads == 1
+
+        stats = test_client.get("/cache/stats", auth=AUTH).json()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["tiers"]["local"]["hits"] == 1
+        assert stats["tiers"]["redis"]["misses"] == 1
+
+    def test_single_read_through(self, test_client: TestClient, test_db):
+        """Повторное чтение студента обслуживается из кеша"""
+        student = add_student(test_db)
+
+        first = test_client.get(f"/students/{student.id}", auth=AUTH)
+        second = test_client.get(f"/students/{student.id}", auth=AUTH)
+
+        assert first.status_code == 200
+        assert second.json() == first.json()
+        assert first.json()["last_name"] == "Иванов"
+        assert test_db.reads == 1
+
+    def test_missing_student_not_cached(self, test_client: TestClient, test_db):
+        """Отсутствующий студент не попадает в кеш"""
+        assert test_client.get("/students/999", auth=AUTH).status_code == 404
+        assert test_client.get("/students/999", auth=AUTH).status_code == 404
+        assert test_db.reads == 2
+
+    def test_write_invalidates_cache(self, test_client: TestClient, test_db):
+        """После создания студента список читается заново"""
+        add_student(test_db)
+        test_client.get("/students/", auth=AUTH)
+
+        response = test_client.post("/students/", auth=AUTH, json={
+            "last_name": "Петров", "first_name": "Иван", "faculty": "ФПМИ",
+            "course": "Мат. Анализ", "grade": 90.0
+        })
+        assert response.status_code == 201
+
+        students = test_client.get("/students/", auth=AUTH).json()
+        assert [student["last_name"] for student in students] == ["Иванов", "Петров"]
+        assert test_db.reads == 2
+
+    def test_redis_failure_falls_back_to_db(self, test_client: TestClient, test_db, redis_server):
+        """При недоступном Redis данные читаются из БД"""
+        add_student(test_db)
+        redis_server.connected = False
+
+        response = test_client.get("/students/", auth=AUTH)
+
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        assert test_client.get("/cache/stats", auth=AUTH).json()["errors"] >= 1
+
+class TestLocalCacheTier:
+    """Тесты локального уровня кеша"""
+
+    def test_redis_hit_fills_local_tier(self, fake_redis):
+        """После попадания в Redis следующий запрос обслуживает локальный уровень"""
+        writer = StudentCache(fake_redis)
+        generation, _ = writer.get_students()
+        writer.set_students(generation, [])
+
+        cache = StudentCache(fake_redis, local=LocalCache())
+        assert cache.get_students() == (generation, [])
+        assert cache.get_students() == (generation, [])
+
+        tiers = cache.stats()["tiers"]
+        assert tiers["redis"]["hits"] == 1
+        assert tiers["local"]["hits"] == 1
+
+    def test_local_entries_expire(self):
+        """Записи локального уровня живут не дольше TTL"""
+        local = LocalCache(ttl=0.01)
+        local.put("all", 1, [])
+        time.sleep(0.02)
+
+        assert local.get("all") is None
+
+    def test_local_tier_is_bounded(self):
+        """Локальный уровень вытесняет давно не использованные записи"""
+        local = LocalCache(max_size=2)
+        local.put(1, 1, "a")
+        local.put(2, 1, "b")
+        local.get(1)
+        local.put(3, 1, "c")
+
+        assert local.get(2) is None
+        assert local.get(1) == (1, "a")
+
+    def test_stale_generation_rejected(self):
+        """Данные поколения, уже объявленного устаревшим, не попадают в локальный уровень"""
+        local = LocalCache()
+        local.invalidate(5)
+        local.put("all", 4, [])
+
+        assert local.get("all") is None
+
+    def test_invalidation_reaches_other_workers(self, fake_redis, redis_server):
+        """Инвалидация в одном процессе очищает локальный уровень другого через pub/sub"""
+        import fakeredis
+
+        other = StudentCache(fakeredis.FakeRedis(server=redis_server, decode_responses=True), local=LocalCache())
+        other.start_listener()
+        try:
+            generation, _ = other.get_students()
+            other.set_students(generation, [])
+            assert len(other.local) == 1
+
+            StudentCache(fake_redis, local=LocalCache()).invalidate()
+
+            deadline = time.monotonic() + 3
+            while len(other.local) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert len(other.local) == 0
+            assert other.get_students() == (generation + 1, None)
+        finally:
+            other.stop_listener()
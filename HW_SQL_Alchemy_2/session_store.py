@@ -0,0 +1,141 @@
+import heapq
+import json
+import os
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+# Время жизни сессии, секунды
+SESSION_TTL = 3600
+# Префикс ключей сессий в Redis
+SESSION_PREFIX = "session"
+
+class SessionStore(ABC):
+    """
+    Хранилище сессий: токен -> запись {"user_id", "username", "created_at"}.
+    Запись содержит всё, что нужно для аутентификации по токену, поэтому
+    обращаться к БД за пользователем не требуется.
+    """
+    def __init__(self, ttl: int = SESSION_TTL):
+        self.ttl = ttl
+
+    def create(self, user_id: int, username: str) -> str:
+        """
+        Создаёт сессию и возвращает её токен.
+        """
+        token = secrets.token_urlsafe(32)
+        self.save(token, {"user_id": user_id, "username": username, "created_at": time.time()})
+        return token
+
+    @abstractmethod
+    def save(self, token: str, session: Dict[str, Any]):
+        """
+        Сохраняет запись сессии на ttl секунд.
+        """
+
+    @abstractmethod
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Запись сессии или None, если сессии нет или она истекла.
+        """
+
+    @abstractmethod
+    def delete(self, token: str) -> bool:
+        """
+        Удаляет сессию. Возвращает False, если её не было.
+        """
+
+    @abstractmethod
+    def count(self) -> int:
+        """
+        Количество активных сессий (для отладки).
+        """
+
+class InMemorySessionStore(SessionStore):
+    """
+    Сессии в памяти процесса. Сроки истечения лежат в куче, и при каждом
+    обращении истёкшие сессии снимаются с её вершины, поэтому память не
+    растёт без ограничения. Подходит только для одного процесса.
+    """
+    def __init__(self, ttl: int = SESSION_TTL):
+        super().__init__(ttl)
+        self.sessions: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.expirations: List[Tuple[float, str]] = []
+        self.lock = threading.Lock()
+
+    def _purge(self, now: float):
+        while self.expirations and self.expirations[0][0] <= now:
+            expires_at, token = heapq.heappop(self.expirations)
+            entry = self.sessions.get(token)
+            # Удалённая или пересозданная сессия оставляет в куче устаревшую запись
+            if entry is not None and entry[0] == expires_at:
+                del self.sessions[token]
+
+    def save(self, token: str, session: Dict[str, Any]):
+        with self.lock:
+            now = time.monotonic()
+            self._purge(now)
+            expires_at = now + self.ttl
+            self.sessions[token] = (expires_at, session)
+            heapq.heappush(self.expirations, (expires_at, token))
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            self._purge(time.monotonic())
+            entry = self.sessions.get(token)
+            return entry[1] if entry is not None else None
+
+    def delete(self, token: str) -> bool:
+        with self.lock:
+            self._purge(time.monotonic())
+            return self.sessions.pop(token, None) is not None
+
+    def count(self) -> int:
+        with self.lock:
+            self._purge(time.monotonic())
+            return len(self.sessions)
+
+class RedisSessionStore(SessionStore):
+    """
+    Сессии в Redis с TTL: общие для всех процессов, истёкшие удаляет сам Redis.
+    Клиент должен быть создан с decode_responses=True.
+    """
+    def __init__(self, client, ttl: int = SESSION_TTL, prefix: str = SESSION_PREFIX):
+        super().__init__(ttl)
+        self.client = client
+        self.prefix = prefix
+
+    def key(self, token: str) -> str:
+        return f"{self.prefix}:{token}"
+
+    def save(self, token: str, session: Dict[str, Any]):
+        self.client.set(self.key(token), json.dumps(session, ensure_ascii=False, separators=(',', ':')),
+                        ex=self.ttl)
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        data = self.client.get(self.key(token))
+        return json.loads(data) if data is not None else None
+
+    def delete(self, token: str) -> bool:
+        return self.client.delete(self.key(token)) > 0
+
+    def count(self) -> int:
+        # SCAN не блокирует Redis, но проходит все ключи: только для отладки
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}:*"))
+
+def create_session_store(redis_url: Optional[str] = None, ttl: int = SESSION_TTL) -> SessionStore:
+    """
+    Хранилище сессий по настройке: при redis_url (или переменной окружения
+    SESSION_REDIS_URL) - в Redis, иначе - в памяти процесса.
+    """
+    redis_url = redis_url or os.environ.get("SESSION_REDIS_URL")
+    if not redis_url:
+        return InMemorySessionStore(ttl)
+
+    try:
+        import redis
+    except ImportError as e:
+        raise ImportError("Для хранения сессий в Redis нужен пакет redis: pip install redis") from e
+    return RedisSessionStore(redis.Redis.from_url(redis_url, decode_responses=True), ttl)
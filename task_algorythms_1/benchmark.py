@@ -0,0 +1,217 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from task import (BRAND_MAPPING, COLOR_MAPPING, SCORING_BACKENDS, SYNONYM_MAPPING, UNIT_MAPPING,
+                  CatalogIndex, disable_profiling, enable_profiling, iter_duplicates)
+
+# Размеры каталогов по умолчанию
+BENCHMARK_SIZES = (10000, 100000, 1000000)
+# Количество новых товаров, проверяемых на каждом каталоге
+BENCHMARK_NEW_ITEMS = 1000
+
+# Словари генератора берутся из таблиц нормализации, чтобы названия проходили все её ветки
+BRANDS = sorted({brand.strip() for brand in BRAND_MAPPING})
+KINDS = sorted(SYNONYM_MAPPING)
+COLORS = sorted(set(COLOR_MAPPING) | set(COLOR_MAPPING.values()))
+MEMORY_UNITS = ['gb', 'GB', 'гб', 'ГБ', 'tb', 'TB', 'тб']
+SIZE_UNITS = sorted(unit for unit, normalized in UNIT_MAPPING.items() if normalized in ('дюйм', 'мм', 'см'))
+SERIES = ['Note', 'Pro', 'Galaxy', 'Mate', 'Pad', 'Band', 'TX', 'S', 'A', 'X', 'P', 'GT']
+SUFFIXES = ['', '', 'Pro', 'Lite', 'Plus', 'Max', 'C', '+']
+MEMORY = [(4, 64), (4, 128), (6, 128), (8, 256), (12, 256), (12, 512)]
+
+def generate_name(rng: random.Random) -> str:
+    """
+    Генерирует правдоподобное название товара.
+    """
+    ram, storage = rng.choice(MEMORY)
+    unit = rng.choice(MEMORY_UNITS)
+    parts = [
+        rng.choice(KINDS),
+        rng.choice(BRANDS).title() if rng.random() < 0.7 else rng.choice(BRANDS).upper(),
+        f"{rng.choice(SERIES)} {rng.randint(1, 99)} {rng.choice(SUFFIXES)}".strip(),
+        f"{ram}/{storage}{unit}" if rng.random() < 0.7 else f"{storage} {unit}",
+    ]
+    if rng.random() < 0.3:
+        parts.append(f"{rng.choice([6.1, 6.5, 10.1, 11, 46, 120])} {rng.choice(SIZE_UNITS)}")
+    if rng.random() < 0.8:
+        parts.append(rng.choice(COLORS))
+    return ' '.join(parts)
+
+def perturb_name(name: str, rng: random.Random) -> str:
+    """
+    Вносит в название изменения, которые нормализация должна сгладить:
+    регистр, перевод цвета, пропуск слова.
+    """
+    words = name.split()
+    for i, word in enumerate(words):
+        lower = word.lower()
+        if lower in COLOR_MAPPING and rng.random() < 0.5:
+            words[i] = COLOR_MAPPING[lower]
+        elif rng.random() < 0.2:
+            words[i] = word.upper() if rng.random() < 0.5 else word.lower()
+    if len(words) > 3 and rng.random() < 0.3:
+        del words[rng.randrange(len(words))]
+    return ' '.join(words)
+
+def generate_catalog(size: int, seed: int = 1, prefix: str = '') -> Dict[str, str]:
+    """
+    Синтетический каталог из size товаров с id prefix0, prefix1, ...
+    """
+    rng = random.Random(seed)
+    return {f"{prefix}{i}": generate_name(rng) for i in range(size)}
+
+def generate_new_items(catalog: Dict[str, str], count: int, seed: int = 2,
+                       duplicate_share: float = 0.5) -> Dict[str, str]:
+    """
+    Новые товары: доля duplicate_share - искажённые копии товаров каталога,
+    остальные - новые случайные названия.
+    """
+    rng = random.Random(seed)
+    names = list(catalog.values())
+    new_items = {}
+    for i in range(count):
+        if names and rng.random() < duplicate_share:
+            new_items[f"new{i}"] = perturb_name(rng.choice(names), rng)
+        else:
+            new_items[f"new{i}"] = generate_name(rng)
+    return new_items
+
+def current_memory_mb() -> Optional[float]:
+    """
+    Текущий размер резидентной памяти процесса (только Linux).
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+def run_case(size: int, new_count: int, workers: int = 1, backend: str = 'python',
+             top_k: Optional[int] = None, seed: int = 1, compact: bool = False, profile: bool = False) -> Dict:
+    """
+    Один замер: генерация, построение индекса и поиск дубликатов.
+    При profile время поиска дополнительно раскладывается по этапам
+    (profiling.Profiler); обёртки замеров замедляют поиск.
+    """
+    started = time.perf_counter()
+    catalog = generate_catalog(size, seed)
+    new_items = generate_new_items(catalog, new_count, seed + 1)
+    generate_time = time.perf_counter() - started
+
+    memory_before = current_memory_mb()
+    started = time.perf_counter()
+    index = CatalogIndex(catalog, compact=compact)
+    index_time = time.perf_counter() - started
+    memory_after = current_memory_mb()
+    del catalog
+
+    stats = Counter()
+    matches = 0
+    profiler = enable_profiling() if profile else None
+    started = time.perf_counter()
+    for _, duplicates in iter_duplicates(new_items, index, workers=workers, backend=backend,
+                                         stats=stats, top_k=top_k):
+        matches += len(duplicates)
+    search_time = time.perf_counter() - started
+    if profiler is not None:
+        profile_stages = profiler.report()["stages"]
+        disable_profiling()
+
+    # На Linux ru_maxrss в килобайтах
+    own_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    workers_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    result = {
+        "catalog_size": size,
+        "new_items": new_count,
+        "workers": workers,
+        "backend": backend,
+        "top_k": top_k,
+        "compact": compact,
+        "matches": matches,
+        "pairs": stats["pairs"],
+        "pairs_per_sec": round(stats["pairs"] / search_time, 1) if search_time else None,
+        "items_per_sec": round(new_count / search_time, 1) if search_time else None,
+        "index_memory_mb": round(memory_after - memory_before, 1) if memory_before is not None else None,
+        "peak_memory_mb": round(own_peak / 1024, 1),
+        "workers_peak_memory_mb": round(workers_peak / 1024, 1),
+        "stage_seconds": {
+            "generate": round(generate_time, 3),
+            "index": round(index_time, 3),
+            "search": round(search_time, 3),
+        },
+        "pruning": {stage: count for stage, count in sorted(stats.items()) if stage != "pairs"},
+    }
+    if profiler is not None:
+        # Этапы внутри поиска: нормализация, отбор кандидатов, оценки схожести
+        result["profile_stages"] = profile_stages
+    return result
+
+def _run_case_child(connection, *args):
+    connection.send(run_case(*args))
+    connection.close()
+
+def run_case_isolated(*args) -> Dict:
+    """
+    Выполняет run_case в отдельном процессе, чтобы пиковая память
+    одного замера не влияла на следующий.
+    """
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_case_child, args=(sender, *args))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        raise RuntimeError(f"Замер {args} завершился с ошибкой (код {process.exitcode})")
+    finally:
+        process.join()
+    return result
+
+def format_result(result: Dict) -> str:
+    stages = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in result["stage_seconds"].items())
+    line = (f"{result['catalog_size']:>8} x {result['new_items']:<6} "
+            f"{result['items_per_sec']:>10} items/s {result['pairs_per_sec']:>12} pairs/s "
+            f"{result['peak_memory_mb']:>8} MB peak {result['index_memory_mb']} MB index  [{stages}]")
+    if "profile_stages" in result:
+        line += '\n' + ' ' * 10 + ', '.join(f"{stage} {entry['seconds']:.2f}s/{entry['calls']}"
+                                             for stage, entry in result["profile_stages"].items()
+                                             if "seconds" in entry)
+    return line
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер производительности поиска дубликатов на синтетических каталогах")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(BENCHMARK_SIZES), help="размеры каталогов")
+    parser.add_argument('--new-items', type=int, default=BENCHMARK_NEW_ITEMS, help="количество новых товаров")
+    parser.add_argument('--workers', type=int, default=1, help="количество процессов для поиска")
+    parser.add_argument('--backend', choices=SCORING_BACKENDS, default='python', help="способ отбора кандидатов")
+    parser.add_argument('--top-k', type=int, help="оставлять не больше указанного числа совпадений на товар")
+    parser.add_argument('--compact', action='store_true', help="компактное представление токенов каталога")
+    parser.add_argument('--profile', action='store_true',
+                        help="разложить время поиска по этапам (замеры замедляют поиск)")
+    parser.add_argument('--seed', type=int, default=1, help="зерно генератора")
+    parser.add_argument('--json', dest='json_filename', help="сохранить результаты в JSON-файл")
+    args = parser.parse_args()
+
+    results: List[Dict] = []
+    for size in args.sizes:
+        result = run_case_isolated(size, args.new_items, args.workers, args.backend, args.top_k, args.seed,
+                                   args.compact, args.profile)
+        print(format_result(result), flush=True)
+        results.append(result)
+
+    if args.json_filename:
+        with open(args.json_filename, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
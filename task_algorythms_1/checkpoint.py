@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+import time
+from typing import NamedTuple, Optional, TextIO
+
+# Версия формата файла контрольной точки
+CHECKPOINT_FORMAT_VERSION = 1
+# Как часто (в секундах) сохранять контрольную точку
+CHECKPOINT_INTERVAL = 30.0
+# Как часто (в секундах) выводить прогресс
+PROGRESS_INTERVAL = 5.0
+
+class Checkpoint(NamedTuple):
+    """
+    Состояние прерванного запуска: сколько новых товаров обработано
+    и до какого байта файл промежуточных результатов им соответствует.
+    """
+    processed: int
+    offset: int
+    fingerprint: str
+
+def checkpoint_filename(output_filename: str) -> str:
+    return output_filename + '.checkpoint'
+
+def partial_filename(output_filename: str) -> str:
+    return output_filename + '.partial'
+
+def load_checkpoint(filename: str, fingerprint: str) -> Optional[Checkpoint]:
+    """
+    Загружает контрольную точку. Если её нет, она повреждена или записана
+    запуском с другими параметрами (другой fingerprint), возвращает None.
+    """
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if not isinstance(state, dict) or state.get("version") != CHECKPOINT_FORMAT_VERSION:
+        return None
+    if state.get("fingerprint") != fingerprint:
+        return None
+    return Checkpoint(state["processed"], state["offset"], state["fingerprint"])
+
+def save_checkpoint(filename: str, checkpoint: Checkpoint):
+    """
+    Сохраняет контрольную точку (атомарно, через временный файл).
+    """
+    state = {"version": CHECKPOINT_FORMAT_VERSION, **checkpoint._asdict()}
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(temp_filename, filename)
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}ч {minutes:02d}м"
+    if minutes:
+        return f"{minutes}м {seconds:02d}с"
+    return f"{seconds}с"
+
+class ProgressMeter:
+    """
+    Вывод прогресса: обработано товаров, скорость и оставшееся время.
+    Скорость считается только по товарам текущего запуска, без
+    обработанных до возобновления.
+    """
+    def __init__(self, total: int, initial: int = 0, interval: float = PROGRESS_INTERVAL,
+                 stream: Optional[TextIO] = None):
+        self.total = total
+        self.initial = initial
+        self.done = initial
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stderr
+        self.started = time.perf_counter()
+        self.reported = self.started
+        # В терминале строка прогресса перезаписывается, в файле - дописывается
+        self.inline = self.stream.isatty()
+
+    def update(self, count: int = 1):
+        self.done += count
+        now = time.perf_counter()
+        if now - self.reported >= self.interval:
+            self.reported = now
+            self._write(self.line(now))
+
+    def line(self, now: Optional[float] = None) -> str:
+        if now is None:
+            now = time.perf_counter()
+        elapsed = now - self.started
+        rate = (self.done - self.initial) / elapsed if elapsed > 0 else 0.0
+        percent = self.done / self.total * 100 if self.total else 100.0
+        line = f"{self.done}/{self.total} ({percent:.1f}%), {rate:.1f} товаров/с"
+        if rate > 0 and self.done < self.total:
+            line += f", осталось ~{format_duration((self.total - self.done) / rate)}"
+        return line
+
+    def finish(self):
+        elapsed = time.perf_counter() - self.started
+        self._write(f"{self.line()}, затрачено {format_duration(elapsed)}")
+        if self.inline:
+            self.stream.write('\n')
+            self.stream.flush()
+
+    def _write(self, line: str):
+        if self.inline:
+            self.stream.write('\r' + line)
+        else:
+            self.stream.write(line + '\n')
+        self.stream.flush()
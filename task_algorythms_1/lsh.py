@@ -0,0 +1,89 @@
+import random
+import zlib
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Простое число Мерсенна для универсального хеширования
+MERSENNE_PRIME = (1 << 61) - 1
+
+def token_hash(token: str) -> int:
+    """
+    Детерминированный хеш токена (не зависит от PYTHONHASHSEED).
+    """
+    return zlib.crc32(token.encode('utf-8'))
+
+def collision_probability(jaccard_similarity: float, bands: int, rows: int) -> float:
+    """
+    Вероятность того, что пара с указанным коэффициентом Жаккара
+    попадёт хотя бы в один общий бакет.
+    """
+    return 1.0 - (1.0 - jaccard_similarity ** rows) ** bands
+
+class MinHashLSH:
+    """
+    MinHash-сигнатуры множеств токенов и LSH-бакеты по полосам сигнатуры.
+    """
+    def __init__(self, bands: int, rows: int, seed: int = 1):
+        if bands < 1 or rows < 1:
+            raise ValueError("Количество полос и строк в полосе должно быть положительным")
+
+        self.bands = bands
+        self.rows = rows
+        self.seed = seed
+
+        rng = random.Random(seed)
+        self.coefficients: List[Tuple[int, int]] = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(bands * rows)
+        ]
+        self.buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(bands)]
+
+    def signature(self, tokens: Iterable[str]) -> List[int]:
+        """
+        Вычисляет MinHash-сигнатуру непустого множества токенов.
+        """
+        hashes = [token_hash(token) for token in tokens]
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self.coefficients]
+
+    def band_keys(self, signature: List[int]) -> List[Tuple[int, ...]]:
+        """
+        Разбивает сигнатуру на ключи бакетов, по одному на полосу.
+        """
+        return [tuple(signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def add(self, position: int, tokens: Set[str]):
+        """
+        Помещает элемент в бакеты всех полос.
+        """
+        if not tokens:
+            return
+        for band, key in enumerate(self.band_keys(self.signature(tokens))):
+            self.buckets[band].setdefault(key, []).append(position)
+
+    def remove(self, position: int, tokens: Set[str]):
+        """
+        Убирает элемент из бакетов, в которые его поместил add.
+        """
+        if not tokens:
+            return
+        for band, key in enumerate(self.band_keys(self.signature(tokens))):
+            bucket = self.buckets[band][key]
+            bucket.remove(position)
+            if not bucket:
+                del self.buckets[band][key]
+
+    def query(self, tokens: Set[str]) -> Set[int]:
+        """
+        Возвращает позиции элементов, совпавших хотя бы в одной полосе.
+        """
+        found = set()
+        if not tokens:
+            return found
+        for band, key in enumerate(self.band_keys(self.signature(tokens))):
+            found.update(self.buckets[band].get(key, ()))
+        return found
+
+    def expected_recall(self, jaccard_similarity: float) -> float:
+        """
+        Ожидаемая полнота для пар с указанным коэффициентом Жаккара.
+        """
+        return collision_probability(jaccard_similarity, self.bands, self.rows)
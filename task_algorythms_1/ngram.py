@@ -0,0 +1,91 @@
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+# Длина символьных n-грамм по умолчанию
+NGRAM_SIZE = 3
+# Сколько профилей последних строк держать в кеше
+PROFILE_CACHE_SIZE = 1 << 16
+
+@lru_cache(maxsize=PROFILE_CACHE_SIZE)
+def ngram_profile(text: str, n: int = NGRAM_SIZE) -> FrozenSet[str]:
+    """
+    Множество символьных n-грамм строки. Строка дополняется пробелами,
+    чтобы начало и конец давали собственные n-граммы и короткие строки
+    не оставались без профиля.
+    """
+    padded = ' ' * (n - 1) + text + ' '
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+def dice_similarity(profile1: FrozenSet[str], profile2: FrozenSet[str]) -> float:
+    """
+    Коэффициент Дайса двух профилей: 2|A ∩ B| / (|A| + |B|).
+    """
+    total = len(profile1) + len(profile2)
+    if not total:
+        return 1.0
+    return 2 * len(profile1 & profile2) / total
+
+def fit_exponent(pairs: Iterable[Tuple[float, float]], candidates: Iterable[float] = None) -> float:
+    """
+    Подбирает показатель степени, при котором dice ** exponent ближе всего
+    (по сумме квадратов отклонений) к эталонной схожести.
+    pairs - пары (эталонная схожесть, коэффициент Дайса).
+    """
+    pairs = list(pairs)
+    if not pairs:
+        raise ValueError("Нет пар для калибровки")
+    if candidates is None:
+        candidates = [step / 100 for step in range(20, 201)]
+    return min(candidates, key=lambda exponent: sum((reference - dice ** exponent) ** 2
+                                                    for reference, dice in pairs))
+
+class NGramIndex:
+    """
+    Инвертированный индекс n-грамм: n-грамма -> позиции строк.
+    Находит строки, у которых коэффициент Дайса с запросом не меньше
+    заданного, считая общие n-граммы по спискам позиций.
+    """
+    def __init__(self, n: int = NGRAM_SIZE):
+        if n < 1:
+            raise ValueError("Длина n-граммы должна быть положительной")
+
+        self.n = n
+        self.postings: Dict[str, List[int]] = {}
+        self.sizes: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def add(self, position: int, text: str):
+        """
+        Добавляет строку под номером position.
+        """
+        profile = ngram_profile(text, self.n)
+        self.sizes[position] = len(profile)
+        for gram in profile:
+            self.postings.setdefault(gram, []).append(position)
+
+    def remove(self, position: int, text: str):
+        """
+        Убирает строку, добавленную методом add.
+        """
+        del self.sizes[position]
+        for gram in ngram_profile(text, self.n):
+            posting = self.postings[gram]
+            posting.remove(position)
+            if not posting:
+                del self.postings[gram]
+
+    def query(self, text: str, min_dice: float) -> Set[int]:
+        """
+        Возвращает позиции строк с коэффициентом Дайса не меньше min_dice.
+        """
+        profile = ngram_profile(text, self.n)
+        shared = Counter()
+        for gram in profile:
+            shared.update(self.postings.get(gram, ()))
+
+        size = len(profile)
+        return {position for position, count in shared.items()
+                if 2 * count >= min_dice * (size + self.sizes[position])}
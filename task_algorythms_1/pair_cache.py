@@ -0,0 +1,114 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+# Версия формата файла кеша
+PAIR_CACHE_FORMAT_VERSION = 1
+# Размер кеша по умолчанию (число пар)
+PAIR_CACHE_SIZE = 500000
+
+class PairCache:
+    """
+    Кеш схожести пар товаров с вытеснением давно не использованных (LRU).
+
+    Ключ - хеш отпечатка параметров алгоритма и обеих нормализованных
+    строк, поэтому пары, посчитанные с другими параметрами, просто не
+    находятся и со временем вытесняются. Значение - схожесть пары или None,
+    если пара отсечена как не достигающая порога.
+    """
+    def __init__(self, fingerprint: str = '', max_size: int = PAIR_CACHE_SIZE):
+        if max_size < 1:
+            raise ValueError("Размер кеша должен быть положительным")
+
+        self.max_size = max_size
+        self.entries: 'OrderedDict[bytes, Optional[float]]' = OrderedDict()
+        self.set_fingerprint(fingerprint)
+        # Записи, добавленные после track_new (для передачи из рабочих процессов)
+        self.new_entries: Optional[List[Tuple[bytes, Optional[float]]]] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def set_fingerprint(self, fingerprint: str):
+        """
+        Задаёт отпечаток параметров, которым подписываются ключи.
+        """
+        self.fingerprint = fingerprint
+        self._key = hashlib.blake2b(fingerprint.encode('utf-8'), digest_size=32).digest()
+
+    def key(self, text1: str, text2: str) -> bytes:
+        """
+        Ключ упорядоченной пары строк (схожесть может быть несимметричной).
+        """
+        return hashlib.blake2b(text1.encode('utf-8') + b'\0' + text2.encode('utf-8'),
+                               key=self._key, digest_size=16).digest()
+
+    def lookup(self, key: bytes) -> Tuple[bool, Optional[float]]:
+        """
+        Возвращает (найдено ли, значение) и отмечает запись как использованную.
+        """
+        try:
+            value = self.entries[key]
+        except KeyError:
+            return False, None
+        self.entries.move_to_end(key)
+        return True, value
+
+    def put(self, key: bytes, value: Optional[float]):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        if self.new_entries is not None:
+            self.new_entries.append((key, value))
+
+    def track_new(self):
+        """
+        Начинает запоминать новые записи, чтобы отдать их методом take_new.
+        """
+        self.new_entries = []
+
+    def take_new(self) -> List[Tuple[bytes, Optional[float]]]:
+        entries = self.new_entries or []
+        if self.new_entries is not None:
+            self.new_entries = []
+        return entries
+
+    def merge(self, entries: Iterable[Tuple[bytes, Optional[float]]]):
+        """
+        Добавляет записи, посчитанные в другом процессе.
+        """
+        for key, value in entries:
+            self.put(key, value)
+
+    def save(self, filename: str):
+        """
+        Сохраняет кеш в файл (атомарно, через временный файл).
+        """
+        state = {"version": PAIR_CACHE_FORMAT_VERSION, "entries": list(self.entries.items())}
+        temp_filename = filename + '.tmp'
+        with open(temp_filename, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, filename)
+
+    @classmethod
+    def load(cls, filename: str, fingerprint: str = '', max_size: int = PAIR_CACHE_SIZE) -> 'PairCache':
+        """
+        Загружает кеш, сохранённый методом save. Отсутствующий, повреждённый
+        или записанный другой версией файл даёт пустой кеш.
+        """
+        cache = cls(fingerprint, max_size)
+        try:
+            with open(filename, 'rb') as f:
+                state = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return cache
+
+        if not isinstance(state, dict) or state.get("version") != PAIR_CACHE_FORMAT_VERSION:
+            return cache
+        # Последние записи - самые свежие, при уменьшении размера остаются они
+        for key, value in state["entries"][-max_size:]:
+            cache.entries[key] = value
+        return cache
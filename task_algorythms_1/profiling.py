@@ -0,0 +1,157 @@
+import json
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Функции модуля поиска и этапы, под которыми учитывается их время
+PROFILED_FUNCTIONS = {
+    'normalize_text': 'normalize',
+    'tokenize_name': 'tokenize',
+    'extract_spec_signature': 'specs',
+    'calculate_jaccard_similarity': 'jaccard',
+    'calculate_ngram_similarity': 'ngram_similarity',
+    'matrix_candidates': 'matrix_candidates',
+}
+# Методы SequenceMatcher и этапы для них
+PROFILED_SEQUENCE_METHODS = {
+    'real_quick_ratio': 'real_quick_ratio',
+    'quick_ratio': 'quick_ratio',
+    'ratio': 'sequence_ratio',
+}
+# Отборы кандидатов: время этапа и число отброшенных ими товаров каталога
+PROFILED_CANDIDATE_METHODS = {
+    'candidates': 'candidates',
+    'lsh_candidates': 'lsh_candidates',
+    'ngram_candidates': 'ngram_candidates',
+}
+
+class Profiler:
+    """
+    Накопительное время и число вызовов по этапам поиска дубликатов,
+    а также число пар, отброшенных каждым фильтром.
+
+    install подменяет функции модуля поиска обёртками с замером времени,
+    uninstall возвращает исходные, поэтому выключенное профилирование
+    ничего не стоит. Время этапов включает вложенные вызовы других этапов.
+    """
+    def __init__(self):
+        self.seconds: Counter = Counter()
+        self.calls: Counter = Counter()
+        self.rejected: Counter = Counter()
+        self.pairs: Counter = Counter()
+        self._originals: List[Tuple[object, str, object]] = []
+
+    def record(self, stage: str, seconds: float):
+        self.seconds[stage] += seconds
+        self.calls[stage] += 1
+
+    def timed(self, stage: str, func: Callable) -> Callable:
+        """
+        Обёртка над func, учитывающая её время под именем stage.
+        """
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+        wrapper.__name__ = getattr(func, '__name__', stage)
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+    def _candidates_timed(self, stage: str, method: Callable) -> Callable:
+        profiler = self
+
+        def wrapper(index, features):
+            started = time.perf_counter()
+            positions = method(index, features)
+            profiler.record(stage, time.perf_counter() - started)
+            profiler.rejected[stage] += len(index) - len(positions)
+            return positions
+        wrapper.__name__ = method.__name__
+        wrapper.__doc__ = method.__doc__
+        return wrapper
+
+    def _patch(self, owner, name: str, replacement):
+        if isinstance(owner, dict):
+            self._originals.append((owner, name, owner[name]))
+            owner[name] = replacement
+        else:
+            self._originals.append((owner, name, owner.__dict__[name]))
+            setattr(owner, name, replacement)
+
+    def install(self, namespace: Dict):
+        """
+        Включает замеры в модуле поиска; namespace - его globals().
+        """
+        if self._originals:
+            return
+        for name, stage in PROFILED_FUNCTIONS.items():
+            self._patch(namespace, name, self.timed(stage, namespace[name]))
+
+        index_class = namespace['CatalogIndex']
+        for name, stage in PROFILED_CANDIDATE_METHODS.items():
+            self._patch(index_class, name, self._candidates_timed(stage, index_class.__dict__[name]))
+
+        sequence_matcher = namespace['SequenceMatcher']
+        methods = {name: self.timed(stage, getattr(sequence_matcher, name))
+                   for name, stage in PROFILED_SEQUENCE_METHODS.items()}
+        self._patch(namespace, 'SequenceMatcher', type('ProfiledSequenceMatcher', (sequence_matcher,), methods))
+
+    def uninstall(self):
+        """
+        Возвращает исходные функции.
+        """
+        while self._originals:
+            owner, name, original = self._originals.pop()
+            if isinstance(owner, dict):
+                owner[name] = original
+            else:
+                setattr(owner, name, original)
+
+    def add_pruning_stats(self, stats: Counter):
+        """
+        Учитывает счётчики отсечения пар из calculate_pruned_similarity.
+        """
+        self.pairs.update(stats)
+        for stage, count in stats.items():
+            if stage.startswith('pruned_'):
+                self.rejected[stage[len('pruned_'):]] += count
+
+    def snapshot(self) -> Dict:
+        return {"seconds": dict(self.seconds), "calls": dict(self.calls),
+                "rejected": dict(self.rejected), "pairs": dict(self.pairs)}
+
+    def merge(self, snapshot: Optional[Dict]):
+        """
+        Добавляет данные, собранные в другом процессе.
+        """
+        if not snapshot:
+            return
+        self.seconds.update(snapshot["seconds"])
+        self.calls.update(snapshot["calls"])
+        self.rejected.update(snapshot["rejected"])
+        self.pairs.update(snapshot["pairs"])
+
+    def reset(self):
+        self.seconds.clear()
+        self.calls.clear()
+        self.rejected.clear()
+        self.pairs.clear()
+
+    def report(self) -> Dict:
+        stages = {}
+        for stage in sorted(self.calls, key=lambda stage: -self.seconds.get(stage, 0.0)):
+            calls = self.calls[stage]
+            entry = {"calls": calls}
+            if stage in self.seconds:
+                seconds = self.seconds[stage]
+                entry["seconds"] = round(seconds, 6)
+                entry["mean_us"] = round(seconds / calls * 1e6, 3) if calls else 0.0
+            stages[stage] = entry
+        return {"stages": stages, "pairs": dict(sorted(self.pairs.items())),
+                "rejected": dict(sorted(self.rejected.items()))}
+
+    def dump(self, filename: str):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,160 @@
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from task import CatalogIndex, build_catalog_index, iter_duplicates, open_catalog_index
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Инициализация приложения
+app = FastAPI(title="Сервис поиска дубликатов товаров", version="1.0.0")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Файл каталога, по которому строится индекс при запуске
+CATALOG_FILE = os.environ.get("DEDUP_CATALOG_FILE", os.path.join(BASE_DIR, "catalog.txt"))
+# Файл сохранённого индекса; если задан, индекс загружается из него и сохраняется в него
+INDEX_FILE = os.environ.get("DEDUP_INDEX_FILE")
+# Ограничение на количество товаров в одном запросе
+MAX_BATCH_SIZE = 1000
+
+# Индекс каталога держится в памяти между запросами
+catalog_index: Optional[CatalogIndex] = None
+# Индекс не потокобезопасен, а обработчики выполняются в пуле потоков
+index_lock = threading.Lock()
+
+# Pydantic-модели для валидации
+class Item(BaseModel):
+    id: str
+    name: str
+
+class CheckRequest(BaseModel):
+    items: List[Item]
+    top_k: Optional[int] = None
+
+class Duplicate(BaseModel):
+    catalog_id: str
+    similarity_score: float
+
+class ItemDuplicates(BaseModel):
+    id: str
+    duplicates: List[Duplicate]
+
+class CheckResponse(BaseModel):
+    results: List[ItemDuplicates]
+    elapsed_ms: float
+
+class CatalogUpdateRequest(BaseModel):
+    items: List[Item] = []
+    remove_ids: List[str] = []
+
+def load_index() -> CatalogIndex:
+    """
+    Строит индекс каталога или загружает сохранённый.
+    """
+    started = time.perf_counter()
+    if INDEX_FILE:
+        index = open_catalog_index(INDEX_FILE, CATALOG_FILE)
+    else:
+        index = build_catalog_index(CATALOG_FILE)
+    logger.info(f"Индекс каталога готов: {len(index)} товаров за {time.perf_counter() - started:.2f} с")
+    return index
+
+def get_index() -> CatalogIndex:
+    """
+    Возвращает индекс каталога, при первом обращении загружая его.
+    Вызывается под index_lock.
+    """
+    global catalog_index
+    if catalog_index is None:
+        catalog_index = load_index()
+    return catalog_index
+
+def check_batch_size(items: List):
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Не больше {MAX_BATCH_SIZE} товаров в одном запросе")
+
+@app.on_event("startup")
+def warm_up():
+    """Загрузка индекса при старте, чтобы первый запрос не ждал"""
+    try:
+        with index_lock:
+            get_index()
+    except FileNotFoundError as e:
+        logger.error(f"Файл {e.filename} не найден, индекс будет построен при первом запросе")
+
+@app.get("/health")
+def health():
+    """Состояние сервиса и размер индекса"""
+    with index_lock:
+        size = len(catalog_index) if catalog_index is not None else None
+    return {"status": "ok", "catalog_size": size}
+
+@app.post("/duplicates/check", response_model=CheckResponse)
+def check_duplicates(request: CheckRequest):
+    """Поиск дубликатов для пачки новых товаров"""
+    check_batch_size(request.items)
+    started = time.perf_counter()
+    try:
+        with index_lock:
+            results = [
+                ItemDuplicates(id=item_id, duplicates=duplicates)
+                for item_id, duplicates in iter_duplicates([(item.id, item.name) for item in request.items],
+                                                           get_index(), top_k=request.top_k)
+            ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=f"Файл {e.filename} не найден")
+    return CheckResponse(results=results, elapsed_ms=round((time.perf_counter() - started) * 1000, 3))
+
+@app.put("/catalog/items")
+def update_catalog(request: CatalogUpdateRequest):
+    """Добавление, изменение и удаление товаров каталога"""
+    check_batch_size(request.items)
+    check_batch_size(request.remove_ids)
+    with index_lock:
+        stats = get_index().update(((item.id, item.name) for item in request.items), request.remove_ids)
+    return stats
+
+@app.delete("/catalog/items/{catalog_id}")
+def remove_catalog_item(catalog_id: str):
+    """Удаление товара из каталога"""
+    with index_lock:
+        removed = get_index().remove(catalog_id)
+    if not removed:
+        raise HTTPException(status_code=404, detail="Товар не найден в каталоге")
+    return {"message": "Товар удалён", "catalog_id": catalog_id}
+
+@app.get("/catalog/items/{catalog_id}")
+def read_catalog_item(catalog_id: str):
+    """Просмотр товара каталога в том виде, в котором он сравнивается"""
+    with index_lock:
+        index = get_index()
+        position = index.positions.get(catalog_id)
+        features = index.features[position] if position is not None else None
+        tokens = sorted(index.token_strings(features.tokens)) if features is not None else []
+    if features is None:
+        raise HTTPException(status_code=404, detail="Товар не найден в каталоге")
+    return {"catalog_id": catalog_id, "normalized_name": features.normalized, "tokens": tokens}
+
+@app.post("/catalog/save")
+def save_catalog():
+    """Сохранение индекса на диск"""
+    if not INDEX_FILE:
+        raise HTTPException(status_code=400, detail="Файл индекса не задан (DEDUP_INDEX_FILE)")
+    with index_lock:
+        index = get_index()
+        index.save(INDEX_FILE)
+        size = len(index)
+    return {"message": "Индекс сохранён", "catalog_size": size}
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)
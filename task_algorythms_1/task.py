@@ -1,122 +1,327 @@
 # Вариант 3
 
+import argparse
+import bisect
+import gc
+import hashlib
+import heapq
+import itertools
 import json
+import math
+import mmap
+import multiprocessing
+import os
+import pickle
 import re
+import time
+from array import array
+from collections import Counter, deque
 from difflib import SequenceMatcher
-from typing import Dict, List, Set
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from checkpoint import (CHECKPOINT_INTERVAL, Checkpoint, ProgressMeter, checkpoint_filename, load_checkpoint,
+                        partial_filename, save_checkpoint)
+from lsh import MinHashLSH
+from ngram import NGramIndex, dice_similarity, fit_exponent, ngram_profile
 
 # Параметры алгоритма
 SIMILARITY_THRESHOLD = 0.8
 USE_PREPROCESSING = True
 
-def normalize_text(text: str) -> str:
+# Веса итоговой оценки схожести
+SEQUENCE_WEIGHT = 0.3
+JACCARD_WEIGHT = 0.7
+SPECS_BONUS = 0.15
+
+# Способы оценки схожести нормализованных строк: SequenceMatcher.ratio()
+# или коэффициент Дайса символьных n-грамм (линейный по длине строк)
+SEQUENCE_BACKENDS = ('sequencematcher', 'ngram')
+SEQUENCE_BACKEND = 'sequencematcher'
+
+# Параметры n-граммной схожести: длина n-граммы и показатель степени,
+# переводящий коэффициент Дайса в шкалу ratio() (подобран
+# calibrate_ngram_exponent на catalog.txt и new_items.txt)
+NGRAM_SIZE = 3
+NGRAM_EXPONENT = 0.64
+
+# Режимы поиска дубликатов
+MATCH_MODES = ('exact', 'lsh', 'brute', 'ngram')
+
+# Параметры приближённого поиска MinHash + LSH
+LSH_BANDS = 20
+LSH_ROWS = 3
+
+# Минимальный коэффициент Дайса n-грамм для кандидатов режима 'ngram'
+NGRAM_MIN_DICE = 0.5
+
+# Способы отбора кандидатов по коэффициенту Жаккара в режиме 'exact'
+SCORING_BACKENDS = ('python', 'numpy')
+# Количество новых товаров в одном блоке векторизованного отбора
+VECTOR_BLOCK_SIZE = 256
+
+# Количество записей каталога, читаемых за один раз
+CATALOG_CHUNK_SIZE = 10000
+
+# Количество новых товаров, обрабатываемых перед выдачей результатов
+STREAM_BATCH_SIZE = 1000
+# Форматы файла результатов: JSON с отступами, компактный JSON, по строке JSON на товар
+OUTPUT_FORMATS = ('pretty', 'compact', 'ndjson')
+
+# Версия формата сохранённого индекса каталога
+INDEX_FORMAT_VERSION = 4
+
+# Цвета (английские -> русские)
+COLOR_MAPPING = {
+    'black': 'черный',
+    'blue': 'синий', 
+    'red': 'красный',
+    'green': 'зеленый',
+    'white': 'белый',
+    'silver': 'серебристый',
+    'gold': 'золотой',
+    'yellow': 'желтый',
+    'gray': 'серый',
+    'grey': 'серый',
+    'pink': 'розовый'
+}
+
+# Единицы измерения и сокращения (заменяются только как отдельные слова)
+UNIT_MAPPING = {
+    'gb': 'гб',
+    'gb.': 'гб',
+    'mb': 'мб',
+    'kb': 'кб',
+    'tb': 'тб',
+    'inch': 'дюйм',
+    '"': 'дюйм',
+    'дюймов': 'дюйм',
+    'дюйма': 'дюйм',
+    'mm': 'мм',
+    'cm': 'см',
+    'kg': 'кг',
+    'g': 'г',
+    'ml': 'мл',
+    'l': 'л',
+    'pro': 'про',
+    'plus': 'плюс',
+    '+': 'плюс'
+}
+
+# Нормализация брендов
+BRAND_MAPPING = {
+    'xiaomi': 'xiaomi',
+    'xiao mi': 'xiaomi',
+    'redmi': 'xiaomi redmi',
+    'mi ': 'xiaomi ',
+    'huawei': 'huawei',
+    'honor': 'huawei honor',
+    'irbis': 'irbis',
+    'samsung': 'samsung',
+    'apple': 'apple',
+    'iphone': 'apple iphone'
+}
+
+# Синонимы и общие замены
+SYNONYM_MAPPING = {
+    'смартфон': 'телефон',
+    'телефон': 'телефон',
+    'phone': 'телефон',
+    'smartphone': 'телефон',
+    'мобильный телефон': 'телефон',
+    'мобильник': 'телефон',
+    'андроид': 'android',
+    'android': 'android',
+    'робот-пылесос': 'робот пылесос',
+    'робот пылесос': 'робот пылесос',
+    'vacuum cleaner': 'робот пылесос',
+    'vacuum': 'пылесос',
+    'пылесос-робот': 'робот пылесос',
+    'часы': 'часы',
+    'watch': 'часы',
+    'часы smart': 'часы',
+    'smart watch': 'часы',
+    'планшет': 'планшет',
+    'tablet': 'планшет',
+    'планшетный компьютер': 'планшет'
+}
+
+STOP_WORDS = {'и', 'в', 'на', 'с', 'для', 'по', 'из', 'от', 'до', 'со', 'под', 'над', 'при'}
+
+def apply_replacements(text: str, mappings: List[Dict[str, str]]) -> str:
     """
-    Нормализация текста для сравнения.
+    Последовательно заменяет подстроки по таблицам (эталонная семантика таблиц).
     """
-    if not USE_PREPROCESSING:
-        return text.lower()
-    
-    text = text.lower()
-    
-    # Цвета (английские -> русские)
-    color_mapping = {
-        'black': 'черный',
-        'blue': 'синий', 
-        'red': 'красный',
-        'green': 'зеленый',
-        'white': 'белый',
-        'silver': 'серебристый',
-        'gold': 'золотой',
-        'yellow': 'желтый',
-        'gray': 'серый',
-        'grey': 'серый',
-        'pink': 'розовый'
-    }
-    
-    for eng_color, ru_color in color_mapping.items():
-        text = text.replace(eng_color, ru_color)
-    
-    # Единицы измерения и сокращения
-    unit_mapping = {
-        'gb': 'гб',
-        'gb.': 'гб',
-        'mb': 'мб',
-        'kb': 'кб',
-        'tb': 'тб',
-        'inch': 'дюйм',
-        '"': 'дюйм',
-        'дюймов': 'дюйм',
-        'дюйма': 'дюйм',
-        'mm': 'мм',
-        'cm': 'см',
-        'kg': 'кг',
-        'g': 'г',
-        'ml': 'мл',
-        'l': 'л',
-        'pro': 'про',
-        'plus': 'плюс',
-        '+': 'плюс'
-    }
+    for mapping in mappings:
+        for variant, replacement in mapping.items():
+            text = text.replace(variant, replacement)
+    return text
+
+class NormalizationEngine:
+    """
+    Скомпилированные таблицы нормализации: все замены выполняются за один
+    проход одного регулярного выражения.
     
-    for unit, replacement in unit_mapping.items():
-        pattern = r'(^|\s)' + re.escape(unit) + r'($|\s)'
-        text = re.sub(pattern, f'\\1{replacement}\\2', text)
-    
-    # Нормализация брендов
-    brand_mapping = {
-        'xiaomi': 'xiaomi',
-        'xiao mi': 'xiaomi',
-        'redmi': 'xiaomi redmi',
-        'mi ': 'xiaomi ',
-        'huawei': 'huawei',
-        'huawei': 'huawei',
-        'honor': 'huawei honor',
-        'irbis': 'irbis',
-        'samsung': 'samsung',
-        'apple': 'apple',
-        'iphone': 'apple iphone'
-    }
+    Таблицы подстрок применяются к тексту по очереди, и результат одной
+    замены может образовать вариант из следующей ('xiao mi ' -> 'xiaomi ' ->
+    'xiaoxiaomi '). Поэтому результат для каждого варианта и для склеек
+    пересекающихся вариантов заранее вычисляется последовательными заменами,
+    а в тексте выбирается самое длинное совпадение. Цепочки из трёх и более
+    вплотную стоящих вариантов ('vacuum-vacuum cleaner') могут нормализоваться
+    иначе, чем при последовательных заменах.
+    """
+    def __init__(self, units: Dict[str, str], mappings: List[Dict[str, str]]):
+        self.units = dict(units)
+        self.mappings = mappings
+        
+        # Замены на самих себя ничего не меняют и не мешают другим заменам
+        rules = [(variant, replacement) for mapping in mappings
+                 for variant, replacement in mapping.items() if variant != replacement]
+        self.table = {variant: apply_replacements(variant, mappings) for variant, _ in rules}
+        
+        base_pattern = self._compile(self.table)
+        for fragment in sorted(self._overlapping_fragments(rules)):
+            expected = apply_replacements(fragment, mappings)
+            if fragment not in self.table and base_pattern.sub(self._substitute, fragment) != expected:
+                self.table[fragment] = expected
+        
+        self.pattern = self._compile(self.table)
+        self.cleanup_pattern = re.compile(r'[^\w\s\/\+]')
     
-    for variant, normalized in brand_mapping.items():
-        if variant in text:
-            text = text.replace(variant, normalized)
-    
-    # Синонимы и общие замены
-    synonym_mapping = {
-        'смартфон': 'телефон',
-        'телефон': 'телефон',
-        'phone': 'телефон',
-        'smartphone': 'телефон',
-        'мобильный телефон': 'телефон',
-        'мобильник': 'телефон',
-        'андроид': 'android',
-        'android': 'android',
-        'робот-пылесос': 'робот пылесос',
-        'робот пылесос': 'робот пылесос',
-        'vacuum cleaner': 'робот пылесос',
-        'vacuum': 'пылесос',
-        'пылесос-робот': 'робот пылесос',
-        'часы': 'часы',
-        'watch': 'часы',
-        'часы smart': 'часы',
-        'smart watch': 'часы',
-        'планшет': 'планшет',
-        'tablet': 'планшет',
-        'планшетный компьютер': 'планшет'
-    }
+    def _compile(self, table: Dict[str, str]) -> re.Pattern:
+        units = '|'.join(re.escape(unit) for unit in sorted(self.units, key=len, reverse=True))
+        variants = '|'.join(re.escape(variant) for variant in sorted(table, key=len, reverse=True))
+        return re.compile(r'(?<!\S)(?P<unit>' + units + r')(?!\S)|' + variants)
     
-    for synonym, replacement in synonym_mapping.items():
-        if synonym in text:
-            text = text.replace(synonym, replacement)
+    def _substitute(self, match: re.Match) -> str:
+        return self.table.get(match.group(), match.group())
     
-    text = re.sub(r'[^\w\s\/\+]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
+    @staticmethod
+    def _overlapping_fragments(rules: List[tuple]) -> Set[str]:
+        """
+        Склейки вариантов, в которых одна замена влияет на другую.
+        """
+        fragments = set()
+        variants = [variant for variant, _ in rules]
+        
+        for variant, replacement in rules:
+            for other in variants:
+                # Варианты пересекаются: конец одного - начало другого
+                for size in range(1, min(len(variant), len(other))):
+                    if variant[-size:] == other[:size]:
+                        fragments.add(variant + other[size:])
+                # Результат замены вместе с соседним текстом образует другой вариант
+                for size in range(1, min(len(replacement), len(other))):
+                    if replacement[-size:] == other[:size]:
+                        fragments.add(variant + other[size:])
+                    if replacement[:size] == other[-size:]:
+                        fragments.add(other[:-size] + variant)
+                start = other.find(replacement)
+                while start != -1 and replacement != other:
+                    fragments.add(other[:start] + variant + other[start + len(replacement):])
+                    start = other.find(replacement, start + 1)
+        
+        return fragments
     
-    stop_words = {'и', 'в', 'на', 'с', 'для', 'по', 'из', 'от', 'до', 'со', 'под', 'над', 'при'}
-    words = text.split()
-    filtered_words = [word for word in words if word not in stop_words]
+    def normalize(self, text: str) -> str:
+        """
+        Нормализует текст, уже приведённый к нижнему регистру.
+        """
+        last_unit_end = {}
+        
+        def replace(match):
+            unit = match.group('unit')
+            if unit is None:
+                return self.table[match.group()]
+            # Замена единицы захватывала пробел после неё, поэтому та же единица
+            # через один пробельный символ оставалась как есть
+            if last_unit_end.get(unit) == match.start() - 1:
+                return unit
+            last_unit_end[unit] = match.end()
+            return self.units[unit]
+        
+        text = self.pattern.sub(replace, text)
+        text = self.cleanup_pattern.sub(' ', text)
+        
+        return ' '.join(word for word in text.split() if word not in STOP_WORDS)
+
+NORMALIZATION_ENGINE = NormalizationEngine(UNIT_MAPPING, [COLOR_MAPPING, BRAND_MAPPING, SYNONYM_MAPPING])
+
+# Активный профилировщик (profiling.Profiler); при None замеры отключены и ничего не стоят
+PROFILER = None
+
+def enable_profiling():
+    """
+    Включает замеры времени по этапам поиска и возвращает профилировщик.
+    """
+    global PROFILER
+    if PROFILER is None:
+        from profiling import Profiler
+        PROFILER = Profiler()
+        PROFILER.install(globals())
+    return PROFILER
+
+def disable_profiling():
+    """
+    Отключает замеры и возвращает исходные функции.
+    """
+    global PROFILER
+    if PROFILER is not None:
+        PROFILER.uninstall()
+        PROFILER = None
+
+# Активный кеш схожести пар (pair_cache.PairCache); при None пары всегда считаются заново
+PAIR_CACHE = None
+
+def enable_pair_cache(filename: Optional[str] = None, max_size: Optional[int] = None):
+    """
+    Включает кеш схожести пар, при filename загружая его из файла,
+    и возвращает его. Сохраняется кеш методом save.
+    """
+    global PAIR_CACHE
+    from pair_cache import PAIR_CACHE_SIZE, PairCache
+    if max_size is None:
+        max_size = PAIR_CACHE_SIZE
+    if filename is not None:
+        PAIR_CACHE = PairCache.load(filename, similarity_fingerprint(), max_size)
+    else:
+        PAIR_CACHE = PairCache(similarity_fingerprint(), max_size)
+    return PAIR_CACHE
+
+def disable_pair_cache():
+    global PAIR_CACHE
+    PAIR_CACHE = None
+
+def normalize_text(text: str) -> str:
+    """
+    Нормализация текста для сравнения.
+    """
+    if not USE_PREPROCESSING:
+        return text.lower()
     
-    return ' '.join(filtered_words)
+    return NORMALIZATION_ENGINE.normalize(text.lower())
+
+def normalization_fingerprint() -> str:
+    """
+    Отпечаток параметров нормализации: сохранённые признаки годятся,
+    только пока он не изменился.
+    """
+    parameters = [USE_PREPROCESSING, COLOR_MAPPING, UNIT_MAPPING, BRAND_MAPPING, SYNONYM_MAPPING, sorted(STOP_WORDS)]
+    return hashlib.blake2b(json.dumps(parameters, ensure_ascii=False).encode('utf-8'), digest_size=16).hexdigest()
+
+def similarity_fingerprint() -> str:
+    """
+    Отпечаток всех параметров, от которых зависит схожесть пары:
+    кешированные оценки годятся, только пока он не изменился.
+    """
+    parameters = [normalization_fingerprint(), SIMILARITY_THRESHOLD, SEQUENCE_WEIGHT, JACCARD_WEIGHT, SPECS_BONUS,
+                  SEQUENCE_BACKEND, NGRAM_SIZE, NGRAM_EXPONENT]
+    return hashlib.blake2b(json.dumps(parameters).encode('utf-8'), digest_size=16).hexdigest()
+
+def name_digest(name: str) -> bytes:
+    """
+    Короткий хеш исходного названия товара.
+    """
+    return hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest()
 
 def tokenize_name(name: str) -> Set[str]:
     """
@@ -135,124 +340,1416 @@ def tokenize_name(name: str) -> Set[str]:
 def calculate_jaccard_similarity(set1: Set[str], set2: Set[str]) -> float:
     """
     Вычисляет коэффициент Жаккара для двух множеств.
+    
+    Второй аргумент может быть любой коллекцией различных токенов,
+    например отсортированным массивом номеров токенов из TokenVocabulary.
     """
     if not set1 or not set2:
         return 0.0
     
     intersection = len(set1.intersection(set2))
-    union = len(set1.union(set2))
+    union = len(set1) + len(set2) - intersection
     
     return intersection / union if union > 0 else 0.0
 
+# Токены, похожие на технические характеристики (одно выражение вместо перебора шаблонов)
+SPEC_TOKEN_PATTERN = re.compile(r'(?:\d+/\d+|\d+\.\d+|\d+дюйм|\d+гб|\d+мм|\d+)$')
+# Типизированные характеристики в исходном названии в нижнем регистре:
+# нормализация разбивает "10.1" на "10 1" и удаляет кавычку дюймов
+MEMORY_PATTERN = re.compile(r'(?<![\w.,/])(\d+) ?/ ?(\d+)(?![\d/])')
+SCREEN_PATTERN = re.compile(r'(?<![\w.,/])(\d+(?:[.,]\d+)?) ?(?:"|”|″|\'\'|дюйм|inch)')
+CAPACITY_PATTERN = re.compile(r'(?<![\w.,])(\d+) ?(gb|гб|tb|тб|mb|мб)(?![^\W\d_])')
+CAPACITY_UNITS = {'gb': 'гб', 'tb': 'тб', 'mb': 'мб'}
+
+class SpecSignature(NamedTuple):
+    """
+    Характеристики товара, извлечённые один раз.
+    
+    values - токены-характеристики, по их пересечению начисляется бонус;
+    memory - конфигурации памяти ('8/256'), screen - диагонали ('10.1'),
+    capacity - объёмы с единицами ('256гб').
+    """
+    values: FrozenSet[str]
+    memory: FrozenSet[str] = frozenset()
+    screen: FrozenSet[str] = frozenset()
+    capacity: FrozenSet[str] = frozenset()
+    
+    def matches(self, other: 'SpecSignature') -> bool:
+        """
+        Совпадение характеристик, то же, что has_matching_specifications.
+        """
+        return not self.values.isdisjoint(other.values)
+    
+    def blocking_key(self) -> Tuple[Tuple[str, ...], ...]:
+        """
+        Ключ блокировки: товары с одинаковыми памятью, диагональю и объёмом.
+        
+        Сравнение только внутри блока теряет совпадения: товары с разной
+        конфигурацией памяти или с характеристикой, указанной лишь в одном
+        из названий, могут набрать порог схожести. Для поиска дубликатов
+        внутри каталога ключ годится только как приблизительный отбор.
+        """
+        return tuple(sorted(self.memory)), tuple(sorted(self.screen)), tuple(sorted(self.capacity))
+
+def extract_spec_signature(name: str, tokens: Set[str]) -> SpecSignature:
+    """
+    Извлекает характеристики из исходного названия в нижнем регистре и его токенов.
+    """
+    return SpecSignature(
+        frozenset(extract_specifications(tokens)),
+        frozenset(f"{ram}/{storage}" for ram, storage in MEMORY_PATTERN.findall(name)),
+        frozenset(screen.replace(',', '.') for screen in SCREEN_PATTERN.findall(name)),
+        frozenset(amount + CAPACITY_UNITS.get(unit, unit) for amount, unit in CAPACITY_PATTERN.findall(name))
+    )
+
+class ItemFeatures(NamedTuple):
+    """
+    Предварительно вычисленные признаки товара.
+    """
+    normalized: str
+    tokens: FrozenSet[str]
+    specs: SpecSignature
+
+def extract_features(name: str) -> ItemFeatures:
+    """
+    Нормализует название и извлекает токены и характеристики один раз.
+    """
+    normalized = normalize_text(name)
+    tokens = tokenize_name(normalized)
+    return ItemFeatures(normalized, frozenset(tokens), extract_spec_signature(name.lower(), tokens))
+
 def calculate_similarity(name1: str, name2: str) -> float:
     """
     Вычисляет общую схожесть двух названий.
     """
-    norm1 = normalize_text(name1)
-    norm2 = normalize_text(name2)
-    
-    if norm1 == norm2:
+    return calculate_features_similarity(extract_features(name1), extract_features(name2))
+
+def calculate_features_similarity(features1: ItemFeatures, features2: ItemFeatures) -> float:
+    """
+    Вычисляет общую схожесть двух товаров по готовым признакам.
+    """
+    if features1.normalized == features2.normalized:
         return 1.0
     
-    sequence_similarity = SequenceMatcher(None, norm1, norm2).ratio()
+    sequence_similarity = calculate_sequence_similarity(features1.normalized, features2.normalized)
     
-    tokens1 = tokenize_name(norm1)
-    tokens2 = tokenize_name(norm2)
-    jaccard_similarity = calculate_jaccard_similarity(tokens1, tokens2)
+    jaccard_similarity = calculate_jaccard_similarity(features1.tokens, features2.tokens)
     
-    has_specs_match = has_matching_specifications(tokens1, tokens2)
+    has_specs_match = features1.specs.matches(features2.specs)
     
-    combined_similarity = 0.3 * sequence_similarity + 0.7 * jaccard_similarity
+    return combine_similarity(sequence_similarity, jaccard_similarity, has_specs_match)
+
+def calculate_sequence_similarity(text1: str, text2: str) -> float:
+    """
+    Схожесть нормализованных строк способом SEQUENCE_BACKEND.
+    """
+    if SEQUENCE_BACKEND == 'ngram':
+        return calculate_ngram_similarity(text1, text2)
+    return SequenceMatcher(None, text1, text2).ratio()
+
+def calculate_ngram_similarity(text1: str, text2: str) -> float:
+    """
+    Коэффициент Дайса символьных n-грамм, приведённый к шкале
+    SequenceMatcher.ratio() степенью NGRAM_EXPONENT. Считается за линейное
+    время, но не учитывает порядок слов: переставленные слова схожесть
+    почти не снижают.
+    """
+    dice = dice_similarity(ngram_profile(text1, NGRAM_SIZE), ngram_profile(text2, NGRAM_SIZE))
+    return dice ** NGRAM_EXPONENT
+
+def calibrate_ngram_exponent(new_items: Dict[str, str], catalog: Dict[str, str]) -> float:
+    """
+    Подбирает NGRAM_EXPONENT так, чтобы n-граммная схожесть всех пар
+    (новый товар, товар каталога) была ближе всего к SequenceMatcher.ratio().
+    """
+    catalog_texts = [normalize_text(name) for name in catalog.values()]
+    pairs = []
+    for name in new_items.values():
+        text = normalize_text(name)
+        for catalog_text in catalog_texts:
+            pairs.append((SequenceMatcher(None, text, catalog_text).ratio(),
+                          dice_similarity(ngram_profile(text, NGRAM_SIZE), ngram_profile(catalog_text, NGRAM_SIZE))))
+    return fit_exponent(pairs)
+
+def combine_similarity(sequence_similarity: float, jaccard_similarity: float, has_specs_match: bool) -> float:
+    """
+    Сводит схожесть последовательностей, коэффициент Жаккара и совпадение
+    характеристик в общую оценку. Не убывает по каждому аргументу, поэтому
+    от верхней оценки sequence_similarity получается верхняя оценка схожести.
+    """
+    combined_similarity = SEQUENCE_WEIGHT * sequence_similarity + JACCARD_WEIGHT * jaccard_similarity
     
     if has_specs_match:
-        combined_similarity = min(1.0, combined_similarity + 0.15)
+        combined_similarity = min(1.0, combined_similarity + SPECS_BONUS)
     
     return combined_similarity
 
+def calculate_pruned_similarity(features1: ItemFeatures, features2: ItemFeatures, threshold: float,
+                                stats: Optional[Counter] = None) -> Optional[float]:
+    """
+    То же, что calculate_features_similarity, но возвращает None, как только
+    становится ясно, что пара не достигнет порога.
+    
+    Этапы отсечения (от дешёвых к дорогим): коэффициент Жаккара при
+    схожести последовательностей 1, затем real_quick_ratio и quick_ratio
+    SequenceMatcher - обе не меньше ratio. В stats считается, сколько пар
+    отсечено на каждом этапе и сколько дошло до полного ratio.
+    
+    При SEQUENCE_BACKEND='ngram' после коэффициента Жаккара сразу
+    считается n-граммная схожесть (этап "ngram") - она дешевле оценок
+    SequenceMatcher.
+    
+    Если включён кеш пар (enable_pair_cache), пары, прошедшие отсечение по
+    коэффициенту Жаккара, сначала ищутся в нём (этап "cached"). Кеш
+    рассчитан на threshold не ниже SIMILARITY_THRESHOLD.
+    """
+    if stats is None:
+        stats = Counter()
+    stats["pairs"] += 1
+    
+    if features1.normalized == features2.normalized:
+        stats["identical"] += 1
+        return 1.0
+    
+    jaccard_similarity = calculate_jaccard_similarity(features1.tokens, features2.tokens)
+    has_specs_match = features1.specs.matches(features2.specs)
+    
+    if combine_similarity(1.0, jaccard_similarity, has_specs_match) < threshold:
+        stats["pruned_jaccard"] += 1
+        return None
+    
+    if PAIR_CACHE is None:
+        return _prune_by_sequence(features1, features2, jaccard_similarity, has_specs_match, threshold, stats)
+    
+    key = PAIR_CACHE.key(features1.normalized, features2.normalized)
+    found, similarity = PAIR_CACHE.lookup(key)
+    if found:
+        stats["cached"] += 1
+        return similarity
+    
+    similarity = _prune_by_sequence(features1, features2, jaccard_similarity, has_specs_match, threshold, stats)
+    # Отсечение при поднятом пороге (top_k) ничего не говорит о SIMILARITY_THRESHOLD
+    if similarity is not None or threshold == SIMILARITY_THRESHOLD:
+        PAIR_CACHE.put(key, similarity)
+    return similarity
+
+def _prune_by_sequence(features1: ItemFeatures, features2: ItemFeatures, jaccard_similarity: float,
+                       has_specs_match: bool, threshold: float, stats: Counter) -> Optional[float]:
+    if SEQUENCE_BACKEND == 'ngram':
+        stats["ngram"] += 1
+        return combine_similarity(calculate_ngram_similarity(features1.normalized, features2.normalized),
+                                  jaccard_similarity, has_specs_match)
+    
+    matcher = SequenceMatcher(None, features1.normalized, features2.normalized)
+    
+    if combine_similarity(matcher.real_quick_ratio(), jaccard_similarity, has_specs_match) < threshold:
+        stats["pruned_real_quick_ratio"] += 1
+        return None
+    
+    if combine_similarity(matcher.quick_ratio(), jaccard_similarity, has_specs_match) < threshold:
+        stats["pruned_quick_ratio"] += 1
+        return None
+    
+    stats["ratio"] += 1
+    return combine_similarity(matcher.ratio(), jaccard_similarity, has_specs_match)
+
+def max_similarity_for_jaccard(jaccard_similarity: float) -> float:
+    """
+    Верхняя граница общей схожести при известном коэффициенте Жаккара.
+    """
+    # Схожесть последовательностей не больше 1, бонус за характеристики считаем полученным
+    return min(1.0, SEQUENCE_WEIGHT * 1.0 + JACCARD_WEIGHT * jaccard_similarity + SPECS_BONUS)
+
+def min_jaccard_for_threshold(threshold: float) -> float:
+    """
+    Минимальный коэффициент Жаккара, при котором пара может достичь порога.
+    """
+    return max(0.0, (threshold - SEQUENCE_WEIGHT - SPECS_BONUS) / JACCARD_WEIGHT)
+
+def extract_specifications(tokens: Set[str]) -> Set[str]:
+    """
+    Отбирает токены, похожие на технические характеристики.
+    """
+    return {token for token in tokens if SPEC_TOKEN_PATTERN.match(token)}
+
 def has_matching_specifications(tokens1: Set[str], tokens2: Set[str]) -> bool:
     """
     Проверяет совпадение технических характеристик.
     """
-    spec_patterns = [
-        r'^\d+/\d+$',
-        r'^\d+\.\d+$',
-        r'^\d+дюйм$',
-        r'^\d+гб$',
-        r'^\d+мм$',
-        r'^\d+$',
-    ]
+    return len(extract_specifications(tokens1).intersection(extract_specifications(tokens2))) > 0
+
+def parse_catalog_line(line: str) -> Optional[Tuple[str, str]]:
+    """
+    Разбирает строку каталога вида "<id> <название>" или "<id>\t<название>".
+    """
+    line = line.strip()
+    if not line:
+        return None
     
-    specs1 = set()
-    specs2 = set()
+    if '\t' in line:
+        parts = line.split('\t', 1)
+    else:
+        parts = line.split(' ', 1)
     
-    for token in tokens1:
-        for pattern in spec_patterns:
-            if re.match(pattern, token):
-                specs1.add(token)
-                break
+    if len(parts) == 2:
+        return parts[0].strip(), parts[1].strip()
+    return None
+
+def _read_lines(filename: str, use_mmap: bool) -> Iterator[str]:
+    if not use_mmap:
+        with open(filename, 'r', encoding='utf-8') as f:
+            yield from f
+        return
     
-    for token in tokens2:
-        for pattern in spec_patterns:
-            if re.match(pattern, token):
-                specs2.add(token)
-                break
+    with open(filename, 'rb') as f:
+        # Пустой файл нельзя отобразить в память
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for line in iter(mapped.readline, b''):
+                yield line.decode('utf-8')
+
+def iter_catalog_chunks(filename: str, chunk_size: int = CATALOG_CHUNK_SIZE,
+                        use_mmap: bool = False) -> Iterator[List[Tuple[str, str]]]:
+    """
+    Потоково читает каталог частями по chunk_size записей (id, название).
     
-    return len(specs1.intersection(specs2)) > 0
+    При use_mmap файл отображается в память, и строки читаются без
+    буферизации всего файла. Если файла нет, выбрасывается FileNotFoundError.
+    """
+    chunk = []
+    for line in _read_lines(filename, use_mmap):
+        record = parse_catalog_line(line)
+        if record is not None:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
 
 def load_catalog(filename: str) -> Dict[str, str]:
     """
     Загружает каталог из файла.
     """
     catalog = {}
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    if '\t' in line:
-                        parts = line.split('\t', 1)
-                    else:
-                        parts = line.split(' ', 1)
-                    
-                    if len(parts) == 2:
-                        product_id = parts[0].strip()
-                        product_name = parts[1].strip()
-                        catalog[product_id] = product_name
-    except FileNotFoundError:
-        print(f"Файл {filename} не найден!")
+    for chunk in iter_catalog_chunks(filename):
+        catalog.update(chunk)
     return catalog
 
-def find_duplicates(new_items: Dict[str, str], catalog: Dict[str, str]) -> Dict[str, List[Dict]]:
+class TokenVocabulary:
+    """
+    Словарь токенов: каждой строке присваивается номер, и множество токенов
+    товара хранится отсортированным массивом номеров array('I')
+    (4 байта на токен вместо отдельного объекта строки и хеш-таблицы).
+    """
+    def __init__(self, tokens: Iterable[str] = ()):
+        self.tokens: List[str] = list(tokens)
+        self.ids: Dict[str, int] = {token: token_id for token_id, token in enumerate(self.tokens)}
+    
+    def __len__(self) -> int:
+        return len(self.tokens)
+    
+    def intern(self, tokens: Iterable[str]) -> array:
+        """
+        Номера токенов (новые токены добавляются в словарь).
+        """
+        token_ids = []
+        for token in tokens:
+            token_id = self.ids.get(token)
+            if token_id is None:
+                token_id = len(self.tokens)
+                self.ids[token] = token_id
+                self.tokens.append(token)
+            token_ids.append(token_id)
+        return array('I', sorted(token_ids))
+    
+    def lookup(self, tokens: Iterable[str]) -> FrozenSet:
+        """
+        Номера известных токенов без изменения словаря. Неизвестные токены
+        остаются строками: они учитываются в размере множества, но не
+        совпадают ни с одним номером.
+        """
+        return frozenset(self.ids.get(token, token) for token in tokens)
+    
+    def decode(self, token_ids: Iterable) -> Set[str]:
+        """
+        Строки токенов по номерам (строки остаются как есть).
+        """
+        return {token if isinstance(token, str) else self.tokens[token] for token in token_ids}
+
+class CatalogIndex:
+    """
+    Инвертированный индекс каталога: токен -> позиции товаров.
+    
+    Удалённые товары оставляют пустое место (id и признаки равны None),
+    чтобы позиции остальных товаров не менялись; compact убирает пропуски.
+    
+    При compact=True токены товаров хранятся номерами из общего словаря
+    (массивы array('I')), списки позиций - тоже массивами, а одинаковые
+    наборы характеристик - одним объектом. Признаки нового товара перед
+    сравнением приводятся к этому виду методом prepare; результаты поиска
+    не меняются.
+    """
+    def __init__(self, catalog: Optional[Dict[str, str]] = None, lsh: Optional[MinHashLSH] = None,
+                 compact: bool = False, ngrams: Optional[NGramIndex] = None):
+        self.ids: List[Optional[str]] = []
+        self.features: List[Optional[ItemFeatures]] = []
+        # Хеши исходных названий, чтобы находить изменённые товары без нормализации
+        self.digests: List[Optional[bytes]] = []
+        self.positions: Dict[str, int] = {}
+        self.postings: Dict[str, List[int]] = {}
+        # Товары без токенов совпадают только при равенстве нормализованных строк
+        self.untokenized: Dict[str, List[int]] = {}
+        # Необязательные LSH-бакеты для приближённого поиска
+        self.lsh = lsh
+        # Необязательный индекс n-грамм нормализованных названий для режима 'ngram'
+        self.ngrams = ngrams
+        # Словарь токенов компактного представления
+        self.vocabulary: Optional[TokenVocabulary] = TokenVocabulary() if compact else None
+        self._signatures: Dict[SpecSignature, SpecSignature] = {}
+        
+        if catalog:
+            self.extend(catalog.items())
+    
+    def __len__(self) -> int:
+        return len(self.positions)
+    
+    def extend(self, records: Iterable[Tuple[str, str]]):
+        """
+        Добавляет в индекс записи (id, название).
+        """
+        for catalog_id, catalog_name in records:
+            self.add(catalog_id, catalog_name)
+    
+    def add(self, catalog_id: str, catalog_name: str):
+        """
+        Добавляет товар в индекс. Повторный id заменяет название товара,
+        сохраняя его место в каталоге (как при загрузке в словарь).
+        """
+        features = self._store_features(extract_features(catalog_name))
+        digest = name_digest(catalog_name)
+        
+        if catalog_id in self.positions:
+            position = self.positions[catalog_id]
+            self._unlink(position)
+            self.features[position] = features
+            self.digests[position] = digest
+        else:
+            position = len(self.ids)
+            self.positions[catalog_id] = position
+            self.ids.append(catalog_id)
+            self.features.append(features)
+            self.digests.append(digest)
+        
+        self._link(position)
+    
+    def remove(self, catalog_id: str) -> bool:
+        """
+        Удаляет товар из индекса. Возвращает False, если товара не было.
+        """
+        position = self.positions.pop(catalog_id, None)
+        if position is None:
+            return False
+        
+        self._unlink(position)
+        self.ids[position] = None
+        self.features[position] = None
+        self.digests[position] = None
+        return True
+    
+    def update(self, upserts: Iterable[Tuple[str, str]] = (), removals: Iterable[str] = ()) -> Dict[str, int]:
+        """
+        Применяет изменения каталога: добавляет или меняет товары из upserts
+        и удаляет товары с id из removals. Нормализуются только изменённые названия.
+        """
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        
+        for catalog_id, catalog_name in upserts:
+            position = self.positions.get(catalog_id)
+            if position is None:
+                stats["added"] += 1
+            elif self.digests[position] == name_digest(catalog_name):
+                stats["unchanged"] += 1
+                continue
+            else:
+                stats["updated"] += 1
+            self.add(catalog_id, catalog_name)
+        
+        for catalog_id in removals:
+            if self.remove(catalog_id):
+                stats["removed"] += 1
+        
+        return stats
+    
+    def sync(self, chunks: Iterable[List[Tuple[str, str]]]) -> Dict[str, int]:
+        """
+        Приводит индекс к полному снимку каталога, поданному частями записей:
+        новые и изменённые товары переиндексируются, отсутствующие удаляются.
+        """
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+        
+        for chunk in chunks:
+            seen.update(catalog_id for catalog_id, _ in chunk)
+            for key, value in self.update(chunk).items():
+                stats[key] += value
+        
+        removals = [catalog_id for catalog_id in self.positions if catalog_id not in seen]
+        stats["removed"] = self.update(removals=removals)["removed"]
+        return stats
+    
+    def live_positions(self) -> List[int]:
+        """
+        Позиции всех товаров индекса в порядке каталога.
+        """
+        return [position for position, catalog_id in enumerate(self.ids) if catalog_id is not None]
+    
+    def compact(self):
+        """
+        Убирает места удалённых товаров и перестраивает списки токенов.
+        """
+        live = self.live_positions()
+        if len(live) == len(self.ids):
+            return
+        
+        self.ids = [self.ids[position] for position in live]
+        self.features = [self.features[position] for position in live]
+        self.digests = [self.digests[position] for position in live]
+        self.positions = {catalog_id: position for position, catalog_id in enumerate(self.ids)}
+        self.postings = {}
+        self.untokenized = {}
+        if self.lsh is not None:
+            self.lsh = MinHashLSH(self.lsh.bands, self.lsh.rows, self.lsh.seed)
+        if self.ngrams is not None:
+            self.ngrams = NGramIndex(self.ngrams.n)
+        
+        for position in range(len(self.ids)):
+            self._link(position)
+    
+    def attach_lsh(self, lsh: MinHashLSH):
+        """
+        Строит LSH-бакеты по уже вычисленным признакам товаров.
+        """
+        self.lsh = lsh
+        for position in self.live_positions():
+            lsh.add(position, self.token_strings(self.features[position].tokens))
+    
+    def attach_ngrams(self, ngrams: NGramIndex):
+        """
+        Строит индекс n-грамм по уже нормализованным названиям товаров.
+        """
+        self.ngrams = ngrams
+        for position in self.live_positions():
+            ngrams.add(position, self.features[position].normalized)
+    
+    def _store_features(self, features: ItemFeatures) -> ItemFeatures:
+        if self.vocabulary is None:
+            return features
+        specs = self._signatures.setdefault(features.specs, features.specs)
+        return ItemFeatures(features.normalized, self.vocabulary.intern(features.tokens), specs)
+    
+    def prepare(self, features: ItemFeatures) -> ItemFeatures:
+        """
+        Приводит признаки нового товара к представлению токенов индекса.
+        """
+        if self.vocabulary is None:
+            return features
+        return features._replace(tokens=self.vocabulary.lookup(features.tokens))
+    
+    def token_strings(self, tokens: Iterable) -> Iterable[str]:
+        """
+        Токены в виде строк (для LSH-сигнатур, которые считаются по строкам).
+        """
+        if self.vocabulary is None:
+            return tokens
+        return self.vocabulary.decode(tokens)
+    
+    def _link(self, position: int):
+        """
+        Добавляет товар в списки токенов, LSH-бакеты и индекс n-грамм.
+        """
+        features = self.features[position]
+        for token in features.tokens:
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = array('I') if self.vocabulary is not None else []
+            posting.append(position)
+        if not features.tokens:
+            self.untokenized.setdefault(features.normalized, []).append(position)
+        if self.lsh is not None:
+            self.lsh.add(position, self.token_strings(features.tokens))
+        if self.ngrams is not None:
+            self.ngrams.add(position, features.normalized)
+    
+    def _unlink(self, position: int):
+        """
+        Убирает товар из списков токенов, LSH-бакетов и индекса n-грамм.
+        """
+        features = self.features[position]
+        for token in features.tokens:
+            self.postings[token].remove(position)
+            if not self.postings[token]:
+                del self.postings[token]
+        if not features.tokens:
+            self.untokenized[features.normalized].remove(position)
+            if not self.untokenized[features.normalized]:
+                del self.untokenized[features.normalized]
+        if self.lsh is not None:
+            self.lsh.remove(position, self.token_strings(features.tokens))
+        if self.ngrams is not None:
+            self.ngrams.remove(position, features.normalized)
+    
+    def save(self, filename: str):
+        """
+        Сохраняет признаки и списки токенов в файл (атомарно, через временный файл).
+        """
+        self.compact()
+        state = {
+            "version": INDEX_FORMAT_VERSION,
+            "fingerprint": normalization_fingerprint(),
+            "ids": self.ids,
+            # Обычные кортежи, чтобы файл не зависел от имени модуля с классами
+            "features": [(features.normalized, features.tokens, tuple(features.specs)) for features in self.features],
+            "digests": self.digests,
+            "postings": self.postings,
+            "untokenized": self.untokenized,
+            "vocabulary": self.vocabulary.tokens if self.vocabulary is not None else None
+        }
+        
+        temp_filename = filename + '.tmp'
+        with open(temp_filename, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, filename)
+    
+    @classmethod
+    def load(cls, filename: str, lsh: Optional[MinHashLSH] = None,
+             ngrams: Optional[NGramIndex] = None) -> 'CatalogIndex':
+        """
+        Загружает индекс, сохранённый методом save.
+        
+        Если индекс построен другой версией программы или с другими таблицами
+        нормализации, выбрасывается ValueError - его нужно построить заново.
+        Повреждённый файл даёт pickle.UnpicklingError или EOFError.
+        """
+        with open(filename, 'rb') as f:
+            state = pickle.load(f)
+        
+        if (not isinstance(state, dict) or state.get("version") != INDEX_FORMAT_VERSION
+                or state.get("fingerprint") != normalization_fingerprint()):
+            raise ValueError(f"Индекс {filename} построен с другими параметрами нормализации")
+        
+        index = cls()
+        if state["vocabulary"] is not None:
+            index.vocabulary = TokenVocabulary(state["vocabulary"])
+        index.ids = state["ids"]
+        for normalized, tokens, specs in state["features"]:
+            specs = SpecSignature._make(specs)
+            index.features.append(ItemFeatures(normalized, tokens, index._signatures.setdefault(specs, specs)))
+        index.digests = state["digests"]
+        index.positions = {catalog_id: position for position, catalog_id in enumerate(index.ids)}
+        index.postings = state["postings"]
+        index.untokenized = state["untokenized"]
+        if lsh is not None:
+            index.attach_lsh(lsh)
+        if ngrams is not None:
+            index.attach_ngrams(ngrams)
+        return index
+    
+    def candidates(self, features: ItemFeatures) -> List[int]:
+        """
+        Возвращает позиции товаров (в порядке каталога), которые могут
+        достичь порога схожести с товаром.
+        """
+        # При низком пороге даже товары без общих токенов проходят фильтр
+        if max_similarity_for_jaccard(0.0) >= SIMILARITY_THRESHOLD:
+            return self.live_positions()
+        
+        tokens = features.tokens
+        if not tokens:
+            return list(self.untokenized.get(features.normalized, []))
+        
+        shared = Counter()
+        for token in tokens:
+            shared.update(self.postings.get(token, ()))
+        
+        positions = []
+        for position, count in shared.items():
+            jaccard_similarity = count / (len(tokens) + len(self.features[position].tokens) - count)
+            if max_similarity_for_jaccard(jaccard_similarity) >= SIMILARITY_THRESHOLD:
+                positions.append(position)
+        
+        positions.sort()
+        return positions
+    
+    def lsh_candidates(self, features: ItemFeatures) -> List[int]:
+        """
+        Возвращает позиции товаров (в порядке каталога), попавших с товаром
+        в общий LSH-бакет. Часть настоящих дубликатов может быть пропущена.
+        """
+        if self.lsh is None:
+            raise ValueError("Индекс построен без LSH-бакетов")
+        
+        if not features.tokens:
+            return list(self.untokenized.get(features.normalized, []))
+        
+        return sorted(self.lsh.query(self.token_strings(features.tokens)))
+    
+    def ngram_candidates(self, features: ItemFeatures) -> List[int]:
+        """
+        Возвращает позиции товаров (в порядке каталога), у которых коэффициент
+        Дайса n-грамм нормализованного названия с товаром не меньше
+        NGRAM_MIN_DICE. Находит и товары с опечатками в токенах, но часть
+        дубликатов с низкой схожестью строк может быть пропущена.
+        """
+        if self.ngrams is None:
+            raise ValueError("Индекс построен без индекса n-грамм")
+        
+        return sorted(self.ngrams.query(features.normalized, NGRAM_MIN_DICE))
+
+def score_candidates(index: CatalogIndex, features: ItemFeatures, positions: Iterable[int],
+                     prune: bool = True, stats: Optional[Counter] = None,
+                     top_k: Optional[int] = None) -> List[Dict]:
+    """
+    Сравнивает товар с кандидатами и возвращает найденные дубликаты.
+    При prune пары, не достигающие порога, отсекаются по верхним оценкам.
+    
+    При top_k хранятся только k лучших совпадений (куча по округлённой
+    оценке, при равенстве выигрывает более ранняя позиция), а порог
+    поднимается до худшего из них, как только куча заполнена.
+    """
+    if prune and stats is None:
+        # Один счётчик на товар, а не на каждую пару в calculate_pruned_similarity
+        stats = Counter()
+    if top_k is not None:
+        return _score_top_candidates(index, features, positions, prune, stats, top_k)
+    
+    duplicates = []
+    
+    for position in positions:
+        if prune:
+            similarity = calculate_pruned_similarity(features, index.features[position], SIMILARITY_THRESHOLD, stats)
+            if similarity is None:
+                continue
+        else:
+            similarity = calculate_features_similarity(features, index.features[position])
+        
+        if similarity >= SIMILARITY_THRESHOLD:
+            duplicates.append({
+                "catalog_id": index.ids[position],
+                "similarity_score": round(similarity, 2)
+            })
+    
+    duplicates.sort(key=lambda x: x["similarity_score"], reverse=True)
+    return duplicates
+
+def _score_top_candidates(index: CatalogIndex, features: ItemFeatures, positions: Iterable[int],
+                          prune: bool, stats: Optional[Counter], top_k: int) -> List[Dict]:
+    # Минимальная куча из (округлённая оценка, -позиция): на вершине худшее из k совпадений
+    heap: List[Tuple[float, int]] = []
+    threshold = SIMILARITY_THRESHOLD
+    
+    for position in sorted(positions):
+        if prune:
+            similarity = calculate_pruned_similarity(features, index.features[position], threshold, stats)
+            if similarity is None:
+                continue
+        else:
+            similarity = calculate_features_similarity(features, index.features[position])
+        
+        if similarity < SIMILARITY_THRESHOLD:
+            continue
+        
+        entry = (round(similarity, 2), -position)
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+        else:
+            continue
+        
+        if len(heap) == top_k:
+            # Оценки ниже heap[0][0] - 0.01 не округлятся даже до худшей из хранимых
+            threshold = max(SIMILARITY_THRESHOLD, heap[0][0] - 0.01)
+    
+    return [{"catalog_id": index.ids[-position], "similarity_score": score}
+            for score, position in sorted(heap, reverse=True)]
+
+def find_item_duplicates(index: CatalogIndex, features: ItemFeatures, mode: str = 'exact',
+                         prune: bool = True, stats: Optional[Counter] = None,
+                         top_k: Optional[int] = None) -> List[Dict]:
+    """
+    Находит дубликаты одного товара в индексе каталога.
+    Признаки должны быть приведены к виду индекса методом index.prepare.
+    """
+    if mode == 'exact':
+        positions = index.candidates(features)
+    elif mode == 'lsh':
+        positions = index.lsh_candidates(features)
+    elif mode == 'ngram':
+        positions = index.ngram_candidates(features)
+    else:
+        positions = index.live_positions()
+    
+    return score_candidates(index, features, positions, prune, stats, top_k)
+
+def build_token_matrix(index: CatalogIndex):
+    """
+    Строит разреженную матрицу токенов каталога для backend='numpy'.
+    """
+    try:
+        from vectorized import TokenMatrix
+    except ImportError as e:
+        raise ImportError("Для backend='numpy' нужен пакет numpy: pip install numpy") from e
+    
+    return TokenMatrix(index.postings, [len(features.tokens) if features else 0 for features in index.features])
+
+def matrix_candidates(index: CatalogIndex, matrix, features_list: List[ItemFeatures]) -> List[List[int]]:
+    """
+    Отбирает кандидатов для группы товаров векторизованно, блоками.
+    Результат совпадает с CatalogIndex.candidates для каждого товара.
+    """
+    if max_similarity_for_jaccard(0.0) >= SIMILARITY_THRESHOLD:
+        return [index.live_positions() for _ in features_list]
+    
+    found = matrix.iter_candidates([features.tokens for features in features_list if features.tokens],
+                                   SIMILARITY_THRESHOLD, (SEQUENCE_WEIGHT, JACCARD_WEIGHT, SPECS_BONUS),
+                                   VECTOR_BLOCK_SIZE)
+    return [next(found) if features.tokens else list(index.untokenized.get(features.normalized, []))
+            for features in features_list]
+
+def find_batch_duplicates(index: CatalogIndex, names: List[str], mode: str = 'exact', matrix=None,
+                          prune: bool = True, stats: Optional[Counter] = None,
+                          top_k: Optional[int] = None) -> List[List[Dict]]:
+    """
+    Находит дубликаты для группы названий; при matrix кандидаты отбираются
+    векторизованно, и до SequenceMatcher доходят только они.
+    """
+    features_list = [index.prepare(extract_features(name)) for name in names]
+    
+    if matrix is None:
+        return [find_item_duplicates(index, features, mode, prune, stats, top_k) for features in features_list]
+    
+    candidate_lists = matrix_candidates(index, matrix, features_list)
+    return [score_candidates(index, features, positions, prune, stats, top_k)
+            for features, positions in zip(features_list, candidate_lists)]
+
+# Индекс, режим поиска, матрица токенов, флаг отсечения и top_k для рабочих процессов
+_worker_state: Optional[tuple] = None
+
+# Параметры модуля, которые можно поменять во время работы (например, из командной строки)
+WORKER_SETTINGS = ('SIMILARITY_THRESHOLD', 'SEQUENCE_BACKEND')
+
+def _init_worker(state: tuple, profile: bool = False, settings: Optional[Dict] = None, pair_cache=None):
+    global _worker_state, PAIR_CACHE
+    _worker_state = state
+    # При запуске без fork модуль импортируется заново со значениями по умолчанию
+    globals().update(settings or {})
+    PAIR_CACHE = pair_cache
+    if profile:
+        enable_profiling()
+    if PAIR_CACHE is not None:
+        PAIR_CACHE.track_new()
+
+def _reset_worker_profile():
+    # Процесс, созданный через fork, унаследовал замеры родителя
+    if PROFILER is not None:
+        PROFILER.reset()
+    # и копию его кеша пар: новые записи отправляются родителю
+    if PAIR_CACHE is not None:
+        PAIR_CACHE.track_new()
+
+def _find_chunk_duplicates(names: List[str]) -> Tuple[List[List[Dict]], Counter, Optional[Dict], List]:
+    index, mode, matrix, prune, top_k = _worker_state
+    stats = Counter()
+    duplicates = find_batch_duplicates(index, names, mode, matrix, prune, stats, top_k)
+    
+    profile = None
+    if PROFILER is not None:
+        profile = PROFILER.snapshot()
+        PROFILER.reset()
+    cache_entries = PAIR_CACHE.take_new() if PAIR_CACHE is not None else []
+    return duplicates, stats, profile, cache_entries
+
+def find_duplicates_parallel(index: CatalogIndex, chunks: Iterable[List[str]], mode: str, workers: int,
+                             matrix=None, prune: bool = True, stats: Optional[Counter] = None,
+                             top_k: Optional[int] = None) -> Iterator[List[List[Dict]]]:
+    """
+    Ищет дубликаты в пуле процессов и выдаёт результаты по частям в порядке chunks,
+    как только каждая часть готова. Замеры профилировщика и новые записи
+    кеша пар из процессов добавляются к замерам и кешу родителя.
+    
+    При старте через fork индекс достаётся процессам копированием при записи,
+    иначе передаётся один раз на процесс через инициализатор, а не с каждой задачей.
+    """
+    global _worker_state
+    
+    state = (index, mode, matrix, prune, top_k)
+    
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        _worker_state = state
+        initializer, initargs = _reset_worker_profile, ()
+        # Сборщик мусора не будет трогать унаследованные объекты и копировать их страницы
+        gc.freeze()
+    else:
+        context = multiprocessing.get_context()
+        settings = {name: globals()[name] for name in WORKER_SETTINGS}
+        initializer, initargs = _init_worker, (state, PROFILER is not None, settings, PAIR_CACHE)
+    
+    try:
+        with context.Pool(workers, initializer, initargs) as pool:
+            for chunk, chunk_stats, profile, cache_entries in pool.imap(_find_chunk_duplicates, chunks):
+                if stats is not None:
+                    stats.update(chunk_stats)
+                if PROFILER is not None:
+                    PROFILER.merge(profile)
+                if PAIR_CACHE is not None:
+                    PAIR_CACHE.merge(cache_entries)
+                yield chunk
+    finally:
+        _worker_state = None
+        gc.unfreeze()
+
+def build_catalog_index(filename: str, lsh: Optional[MinHashLSH] = None,
+                        chunk_size: int = CATALOG_CHUNK_SIZE, use_mmap: bool = False,
+                        compact: bool = False, ngrams: Optional[NGramIndex] = None) -> CatalogIndex:
+    """
+    Строит индекс каталога по мере чтения файла, не держа в памяти весь текст.
+    """
+    index = CatalogIndex(lsh=lsh, compact=compact, ngrams=ngrams)
+    for chunk in iter_catalog_chunks(filename, chunk_size, use_mmap):
+        index.extend(chunk)
+    return index
+
+def open_catalog_index(index_filename: str, catalog_filename: str, lsh: Optional[MinHashLSH] = None,
+                       chunk_size: int = CATALOG_CHUNK_SIZE, use_mmap: bool = False,
+                       compact: bool = False, ngrams: Optional[NGramIndex] = None) -> CatalogIndex:
+    """
+    Загружает сохранённый индекс и синхронизирует его с файлом каталога,
+    переиндексируя только изменившиеся товары. Если сохранённого индекса
+    нет, он повреждён, устарел или его представление токенов не совпадает
+    с compact, индекс строится заново. Результат сохраняется.
+    """
+    try:
+        index = CatalogIndex.load(index_filename, lsh=lsh, ngrams=ngrams)
+        if (index.vocabulary is not None) != compact:
+            raise ValueError(f"Индекс {index_filename} построен с другим представлением токенов")
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, ValueError):
+        index = build_catalog_index(catalog_filename, lsh, chunk_size, use_mmap, compact, ngrams)
+    else:
+        stats = index.sync(iter_catalog_chunks(catalog_filename, chunk_size, use_mmap))
+        if not (stats["added"] or stats["updated"] or stats["removed"]):
+            return index
+    
+    index.save(index_filename)
+    return index
+
+def _iter_batches(items: Iterable, batch_size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_duplicates(new_items: Union[Dict[str, str], Iterable[Tuple[str, str]]],
+                    catalog: Union[Dict[str, str], CatalogIndex], mode: str = 'exact',
+                    bands: int = LSH_BANDS, rows: int = LSH_ROWS, workers: int = 1,
+                    backend: str = 'python', prune: bool = True, stats: Optional[Counter] = None,
+                    top_k: Optional[int] = None,
+                    batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Tuple[str, List[Dict]]]:
+    """
+    Потоково выдаёт пары (id нового товара, дубликаты) в порядке new_items.
+    
+    Новые товары (словарь или последовательность пар id, название) обрабатываются
+    частями по batch_size, и результаты части выдаются сразу после её обработки.
+    Параметры те же, что у find_duplicates.
+    """
+    if mode not in MATCH_MODES:
+        raise ValueError(f"Неподдерживаемый режим поиска: {mode}")
+    if backend not in SCORING_BACKENDS:
+        raise ValueError(f"Неподдерживаемый способ отбора кандидатов: {backend}")
+    if SEQUENCE_BACKEND not in SEQUENCE_BACKENDS:
+        raise ValueError(f"Неподдерживаемый способ оценки схожести строк: {SEQUENCE_BACKEND}")
+    if PAIR_CACHE is not None:
+        # Параметры могли измениться после включения кеша
+        PAIR_CACHE.set_fingerprint(similarity_fingerprint())
+    if backend == 'numpy' and mode != 'exact':
+        raise ValueError("backend='numpy' поддерживается только в режиме 'exact'")
+    if workers < 1:
+        raise ValueError("Количество процессов должно быть положительным")
+    if top_k is not None and top_k < 1:
+        raise ValueError("top_k должно быть положительным")
+    if batch_size < 1:
+        raise ValueError("Размер части должен быть положительным")
+    
+    if isinstance(catalog, CatalogIndex):
+        index = catalog
+        if mode == 'lsh' and index.lsh is None:
+            raise ValueError("Для режима 'lsh' индекс должен быть построен с LSH-бакетами")
+        if mode == 'ngram' and index.ngrams is None:
+            raise ValueError("Для режима 'ngram' индекс должен быть построен с индексом n-грамм")
+    else:
+        index = CatalogIndex(catalog, lsh=MinHashLSH(bands, rows) if mode == 'lsh' else None,
+                             ngrams=NGramIndex(NGRAM_SIZE) if mode == 'ngram' else None)
+    matrix = build_token_matrix(index) if backend == 'numpy' else None
+    
+    if isinstance(new_items, dict):
+        if len(new_items) <= 1:
+            workers = 1
+        elif workers > 1:
+            # Несколько частей на процесс, чтобы выровнять нагрузку
+            batch_size = max(1, min(batch_size, -(-len(new_items) // (workers * 4))))
+        new_items = new_items.items()
+    batches = _iter_batches(new_items, batch_size)
+    
+    if workers == 1:
+        for batch in batches:
+            names = [name for _, name in batch]
+            yield from zip((new_id for new_id, _ in batch),
+                           find_batch_duplicates(index, names, mode, matrix, prune, stats, top_k))
+        return
+    
+    # Пул забирает части заранее, id ждут своих результатов в очереди
+    pending_ids = deque()
+    
+    def name_batches():
+        for batch in batches:
+            pending_ids.append([new_id for new_id, _ in batch])
+            yield [name for _, name in batch]
+    
+    for matches in find_duplicates_parallel(index, name_batches(), mode, workers, matrix, prune, stats, top_k):
+        yield from zip(pending_ids.popleft(), matches)
+
+def find_duplicates(new_items: Dict[str, str], catalog: Union[Dict[str, str], CatalogIndex], mode: str = 'exact',
+                    bands: int = LSH_BANDS, rows: int = LSH_ROWS, workers: int = 1,
+                    backend: str = 'python', prune: bool = True,
+                    stats: Optional[Counter] = None, top_k: Optional[int] = None) -> Dict[str, List[Dict]]:
     """
     Находит дубликаты для новых товаров.
+    
+    Режим 'exact' сравнивает только кандидатов из инвертированного индекса,
+    режим 'brute' - все пары; результаты у них совпадают.
+    Режим 'lsh' отбирает кандидатов по MinHash-бакетам (bands полос по rows
+    строк) и может пропустить часть дубликатов, см. lsh_recall_report.
+    Режим 'ngram' отбирает кандидатов по индексу символьных n-грамм
+    (коэффициент Дайса не ниже NGRAM_MIN_DICE) и тоже приближённый.
+    
+    Схожесть строк считается способом SEQUENCE_BACKEND: по умолчанию
+    SequenceMatcher.ratio(), при 'ngram' - коэффициентом Дайса n-грамм,
+    откалиброванным под ту же шкалу (см. calibrate_ngram_exponent).
+    
+    Признаки товаров каталога вычисляются один раз при построении индекса;
+    вместо словаря можно передать уже построенный CatalogIndex.
+    При workers > 1 новые товары делятся между процессами, результат
+    совпадает с однопроцессным.
+    
+    backend='numpy' в режиме 'exact' отбирает кандидатов блоками через
+    разреженную матрицу токенов (нужен numpy); результат тот же.
+    
+    prune включает отсечение пар по верхним оценкам схожести до вызова
+    SequenceMatcher.ratio(); результат не меняется. Если передан stats,
+    в него добавляется число пар, отсечённых на каждом этапе. При prune
+    и включённом кеше пар (enable_pair_cache) уже посчитанные пары берутся
+    из кеша.
+    
+    top_k ограничивает число совпадений на товар: возвращаются первые k
+    из полного списка, но без его хранения и сортировки целиком.
+    """
+    return dict(iter_duplicates(new_items, catalog, mode, bands, rows, workers, backend, prune, stats, top_k))
+
+def write_duplicates(results: Iterable[Tuple[str, List[Dict]]], f, output_format: str = 'pretty') -> int:
+    """
+    Записывает результаты по мере их поступления и возвращает число товаров.
+    
+    'pretty' и 'compact' дают один JSON-объект (с отступами как у json.dump
+    с indent=2 или без пробелов), 'ndjson' - по строке
+    {"new_item_id": ..., "duplicates": [...]} на товар со сбросом буфера
+    после каждой, чтобы результаты можно было читать во время работы.
     """
-    results = {}
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат результатов: {output_format}")
     
-    for new_id, new_name in new_items.items():
-        duplicates = []
+    count = 0
+    
+    if output_format == 'ndjson':
+        for new_id, matches in results:
+            f.write(json.dumps({"new_item_id": new_id, "duplicates": matches}, ensure_ascii=False) + '\n')
+            f.flush()
+            count += 1
+        return count
+    
+    f.write('{')
+    for new_id, matches in results:
+        if output_format == 'pretty':
+            # Запись объекта из одной пары без внешних скобок и последнего перевода строки
+            entry = json.dumps({new_id: matches}, ensure_ascii=False, indent=2)[1:-2]
+        else:
+            entry = json.dumps({new_id: matches}, ensure_ascii=False, separators=(',', ':'))[1:-1]
+        f.write(entry if count == 0 else ',' + entry)
+        count += 1
+    f.write('\n}' if count and output_format == 'pretty' else '}')
+    return count
+
+def file_signature(filename: str) -> List[int]:
+    """
+    Размер и время изменения файла: признак того, что файл не менялся.
+    """
+    stat = os.stat(filename)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def run_duplicates_job(new_items_filename: str, catalog: CatalogIndex, output_filename: str,
+                       output_format: str = 'pretty', resume: bool = False, mode: str = 'exact',
+                       workers: int = 1, backend: str = 'python', prune: bool = True,
+                       stats: Optional[Counter] = None, top_k: Optional[int] = None,
+                       batch_size: int = STREAM_BATCH_SIZE, catalog_filename: Optional[str] = None,
+                       progress: bool = True, checkpoint_interval: float = CHECKPOINT_INTERVAL) -> int:
+    """
+    Ищет дубликаты для товаров из файла new_items_filename так, чтобы
+    прерванный запуск можно было продолжить.
+    
+    Результаты пишутся построчно (NDJSON): в формате 'ndjson' сразу в
+    output_filename, чтобы их можно было читать во время работы, в остальных
+    в <output_filename>.results_filename. Не реже раза в checkpoint_interval секунд в
+    <output_filename>.checkpoint сохраняется, сколько товаров обработано и
+    какой длины их часть файла (также при прерывании по Ctrl+C). При resume
+    запуск с теми же параметрами, файлом новых товаров и файлом каталога
+    catalog_filename продолжается с этого места: файл обрезается до длины из
+    контрольной точки. Иначе запуск начинается заново. В конце результаты
+    из .results_filename переписываются в output_filename в формате output_format,
+    а служебные файлы удаляются. При progress в stderr выводятся прогресс,
+    скорость и оставшееся время. Возвращает число новых товаров.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат результатов: {output_format}")
+    
+    new_items = load_catalog(new_items_filename)
+    parameters = [similarity_fingerprint(), mode, top_k, file_signature(new_items_filename),
+                  file_signature(catalog_filename) if catalog_filename else None]
+    fingerprint = hashlib.blake2b(json.dumps(parameters).encode('utf-8'), digest_size=16).hexdigest()
+    
+    # NDJSON и есть итоговый формат: переписывать его из .partial не нужно
+    results_filename = output_filename if output_format == 'ndjson' else partial_filename(output_filename)
+    checkpoint_file = checkpoint_filename(output_filename)
+    checkpoint = load_checkpoint(checkpoint_file, fingerprint) if resume else None
+    if (checkpoint is not None and os.path.exists(results_filename)
+            and os.path.getsize(results_filename) >= checkpoint.offset):
+        # Строки, дописанные после контрольной точки, будут посчитаны заново
+        os.truncate(results_filename, checkpoint.offset)
+    else:
+        checkpoint = Checkpoint(0, 0, fingerprint)
+    
+    meter = ProgressMeter(len(new_items), checkpoint.processed) if progress else None
+    records = itertools.islice(new_items.items(), checkpoint.processed, None)
+    
+    with open(results_filename, 'a' if checkpoint.processed else 'w', encoding='utf-8') as f:
+        saved_at = time.perf_counter()
         
-        for catalog_id, catalog_name in catalog.items():
-            similarity = calculate_similarity(new_name, catalog_name)
-            
-            if similarity >= SIMILARITY_THRESHOLD:
-                duplicates.append({
-                    "catalog_id": catalog_id,
-                    "similarity_score": round(similarity, 2)
-                })
+        def checkpointed(results):
+            nonlocal checkpoint, saved_at
+            for result in results:
+                yield result
+                # Сюда возвращаемся, когда строка результата уже записана
+                checkpoint = Checkpoint(checkpoint.processed + 1, f.tell(), fingerprint)
+                if meter is not None:
+                    meter.update()
+                if time.perf_counter() - saved_at >= checkpoint_interval:
+                    os.fsync(f.fileno())
+                    save_checkpoint(checkpoint_file, checkpoint)
+                    saved_at = time.perf_counter()
         
-        duplicates.sort(key=lambda x: x["similarity_score"], reverse=True)
-        results[new_id] = duplicates
+        try:
+            write_duplicates(checkpointed(iter_duplicates(records, catalog, mode, workers=workers, backend=backend,
+                                                          prune=prune, stats=stats, top_k=top_k,
+                                                          batch_size=batch_size)),
+                             f, 'ndjson')
+        except KeyboardInterrupt:
+            f.flush()
+            save_checkpoint(checkpoint_file, checkpoint)
+            raise
+    
+    if output_format != 'ndjson':
+        with open(results_filename, 'r', encoding='utf-8') as src, open(output_filename, 'w', encoding='utf-8') as f:
+            records = (json.loads(line) for line in src)
+            write_duplicates(((record["new_item_id"], record["duplicates"]) for record in records), f, output_format)
+        os.remove(results_filename)
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
     
-    return results
+    if meter is not None:
+        meter.finish()
+    return len(new_items)
+
+def _find_root(parents: List[int], position: int) -> int:
+    while parents[position] != position:
+        # Сокращение пути: ссылка через одного предка
+        parents[position] = parents[parents[position]]
+        position = parents[position]
+    return position
+
+def iter_prefix_candidates(index: CatalogIndex, min_jaccard: float) -> Iterator[Tuple[int, List[int]]]:
+    """
+    Блокировка по префиксам для поиска дубликатов внутри каталога: для каждой
+    позиции выдаёт более ранние позиции, у которых коэффициент Жаккара с ней
+    может быть не меньше min_jaccard.
+    
+    Токены товара упорядочиваются от редких к частым, и в индекс попадают
+    только первые len - ceil(min_jaccard * len) + 1 из них: у пары с
+    коэффициентом не меньше min_jaccard общий токен найдётся среди префиксов.
+    При min_jaccard <= 0 блокировка невозможна, и выдаются все ранние позиции.
+    """
+    frequency = {token: len(positions) for token, positions in index.postings.items()}
+    prefix_postings: Dict[str, List[int]] = {}
+    untokenized: Dict[str, List[int]] = {}
+    seen: List[int] = []
+    
+    for position in index.live_positions():
+        features = index.features[position]
+        
+        if min_jaccard <= 0.0:
+            yield position, list(seen)
+            seen.append(position)
+            continue
+        
+        if not features.tokens:
+            group = untokenized.setdefault(features.normalized, [])
+            yield position, list(group)
+            group.append(position)
+            continue
+        
+        ordered = sorted(features.tokens, key=lambda token: (frequency[token], token))
+        prefix_length = len(ordered) - math.ceil(min_jaccard * len(ordered)) + 1
+        found = set()
+        for token in ordered[:prefix_length]:
+            bucket = prefix_postings.setdefault(token, [])
+            found.update(bucket)
+            bucket.append(position)
+        yield position, sorted(found)
+
+def iter_self_candidates(index: CatalogIndex, backend: str = 'python') -> Iterator[Tuple[int, List[int]]]:
+    """
+    Для каждой позиции каталога выдаёт более ранние позиции, у которых
+    верхняя граница схожести по коэффициенту Жаккара достигает порога.
+    
+    backend='python' - блокировка по префиксам и проверка границы для каждой
+    пары, 'numpy' - векторизованный отбор через матрицу токенов.
+    """
+    if backend == 'numpy':
+        matrix = build_token_matrix(index)
+        for batch in _iter_batches(index.live_positions(), VECTOR_BLOCK_SIZE):
+            found = matrix_candidates(index, matrix, [index.features[position] for position in batch])
+            for position, candidates in zip(batch, found):
+                yield position, candidates[:bisect.bisect_left(candidates, position)]
+        return
+    
+    # Небольшой запас, чтобы ошибка округления не сузила префиксы
+    min_jaccard = min_jaccard_for_threshold(SIMILARITY_THRESHOLD) - 1e-9
+    
+    for position, candidates in iter_prefix_candidates(index, min_jaccard):
+        tokens = frozenset(index.features[position].tokens)
+        if not tokens or min_jaccard <= 0.0:
+            yield position, candidates
+            continue
+        
+        filtered = []
+        for other in candidates:
+            other_tokens = index.features[other].tokens
+            shared = len(tokens.intersection(other_tokens))
+            if max_similarity_for_jaccard(shared / (len(tokens) + len(other_tokens) - shared)) >= SIMILARITY_THRESHOLD:
+                filtered.append(other)
+        yield position, filtered
+
+def find_catalog_clusters(catalog: Union[Dict[str, str], CatalogIndex], prune: bool = True,
+                          stats: Optional[Counter] = None, backend: str = 'python') -> List[Dict]:
+    """
+    Находит группы дубликатов внутри одного каталога.
+    
+    Пары отбираются блокировкой по префиксам токенов (без сравнения всех
+    со всеми) или, при backend='numpy', через матрицу токенов; результат
+    одинаков. Совпавшие пары объединяются системой непересекающихся
+    множеств. Пары, уже попавшие в одну группу, повторно не сравниваются.
+    Группа - это компонента связности: товары в ней связаны цепочкой пар
+    со схожестью не ниже порога (схожесть пары считается от более раннего
+    товара к более позднему).
+    
+    Возвращает группы из двух и более товаров в порядке каталога:
+    {"representative_id": первый товар группы, "ids": [...]}.
+    """
+    if backend not in SCORING_BACKENDS:
+        raise ValueError(f"Неподдерживаемый способ отбора кандидатов: {backend}")
+    if SEQUENCE_BACKEND not in SEQUENCE_BACKENDS:
+        raise ValueError(f"Неподдерживаемый способ оценки схожести строк: {SEQUENCE_BACKEND}")
+    if PAIR_CACHE is not None:
+        # Параметры могли измениться после включения кеша
+        PAIR_CACHE.set_fingerprint(similarity_fingerprint())
+    
+    index = catalog if isinstance(catalog, CatalogIndex) else CatalogIndex(catalog)
+    if stats is None:
+        stats = Counter()
+    
+    parents = list(range(len(index.features)))
+    
+    for position, candidates in iter_self_candidates(index, backend):
+        features = index.features[position]
+        for other in candidates:
+            root, other_root = _find_root(parents, position), _find_root(parents, other)
+            if root == other_root:
+                stats["already_clustered"] += 1
+                continue
+            
+            other_features = index.features[other]
+            if index.vocabulary is not None:
+                # Первый аргумент коэффициента Жаккара должен быть множеством
+                other_features = other_features._replace(tokens=frozenset(other_features.tokens))
+            
+            # SequenceMatcher несимметричен: более ранний товар всегда первый
+            if prune:
+                similarity = calculate_pruned_similarity(other_features, features, SIMILARITY_THRESHOLD, stats)
+            else:
+                similarity = calculate_features_similarity(other_features, features)
+            
+            if similarity is not None and similarity >= SIMILARITY_THRESHOLD:
+                # Корнем остаётся меньшая позиция, она и будет представителем группы
+                parents[max(root, other_root)] = min(root, other_root)
+    
+    groups: Dict[int, List[int]] = {}
+    for position in index.live_positions():
+        groups.setdefault(_find_root(parents, position), []).append(position)
+    
+    return [
+        {"representative_id": index.ids[root], "ids": [index.ids[position] for position in members]}
+        for root, members in sorted(groups.items())
+        if len(members) > 1
+    ]
+
+def lsh_recall_report(new_items: Dict[str, str], catalog: Dict[str, str],
+                      bands: int = LSH_BANDS, rows: int = LSH_ROWS) -> Dict:
+    """
+    Сравнивает режим 'lsh' с точным режимом и оценивает потерю полноты.
+    """
+    exact_results = find_duplicates(new_items, catalog, mode='exact')
+    lsh_results = find_duplicates(new_items, catalog, mode='lsh', bands=bands, rows=rows)
+    
+    exact_pairs = {(new_id, match["catalog_id"]) for new_id, matches in exact_results.items() for match in matches}
+    lsh_pairs = {(new_id, match["catalog_id"]) for new_id, matches in lsh_results.items() for match in matches}
+    min_jaccard = min_jaccard_for_threshold(SIMILARITY_THRESHOLD)
+    
+    return {
+        "bands": bands,
+        "rows": rows,
+        "min_jaccard": round(min_jaccard, 4),
+        # Полнота для пар на границе порога; у более похожих пар она выше
+        "expected_recall_at_min_jaccard": round(MinHashLSH(bands, rows).expected_recall(min_jaccard), 4),
+        "exact_pairs": len(exact_pairs),
+        "found_pairs": len(exact_pairs & lsh_pairs),
+        "recall": round(len(exact_pairs & lsh_pairs) / len(exact_pairs), 4) if exact_pairs else 1.0
+    }
 
 def main():
-    catalog = load_catalog('task_algorythms_1/catalog.txt')
-    new_items = load_catalog('task_algorythms_1/new_items.txt')
+    global SEQUENCE_BACKEND, SIMILARITY_THRESHOLD
+    parser = argparse.ArgumentParser(description="Поиск дубликатов товаров в каталоге")
+    parser.add_argument('--catalog', default='task_algorythms_1/catalog.txt', help="файл каталога")
+    parser.add_argument('--new-items', default='task_algorythms_1/new_items.txt', help="файл новых товаров")
+    parser.add_argument('--output', help="файл результатов (по умолчанию duplicates.json, duplicates.ndjson "
+                                         "или clusters.json рядом с каталогом по умолчанию)")
+    parser.add_argument('--threshold', type=float, default=SIMILARITY_THRESHOLD, help="порог схожести")
+    parser.add_argument('--mode', choices=MATCH_MODES, default='exact', help="режим отбора кандидатов")
+    parser.add_argument('--workers', type=int, default=1, help="количество процессов для поиска")
+    parser.add_argument('--batch-size', type=int, default=STREAM_BATCH_SIZE,
+                        help="количество новых товаров в одной части")
+    parser.add_argument('--backend', choices=SCORING_BACKENDS, default='python',
+                        help="способ отбора кандидатов по коэффициенту Жаккара")
+    parser.add_argument('--sequence-backend', choices=SEQUENCE_BACKENDS, default=SEQUENCE_BACKEND,
+                        help="способ оценки схожести нормализованных строк")
+    parser.add_argument('--no-prune', dest='prune', action='store_false',
+                        help="не отсекать пары по верхним оценкам схожести")
+    parser.add_argument('--top-k', type=int, help="оставлять не больше указанного числа совпадений на товар")
+    parser.add_argument('--stats', action='store_true', help="вывести, сколько пар отсечено на каждом этапе")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='pretty',
+                        help="формат результатов; ndjson пишется в duplicates.ndjson построчно")
+    parser.add_argument('--resume', action='store_true',
+                        help="продолжить прерванный запуск с теми же параметрами с последней контрольной точки")
+    parser.add_argument('--checkpoint-interval', type=float, default=CHECKPOINT_INTERVAL,
+                        help="как часто (в секундах) сохранять контрольную точку")
+    parser.add_argument('--quiet', action='store_true', help="не выводить прогресс")
+    parser.add_argument('--profile', metavar='FILE', help="замерить время этапов и сохранить отчёт в JSON-файл")
+    parser.add_argument('--self-dedup', action='store_true',
+                        help="найти группы дубликатов внутри каталога и записать их в clusters.json "
+                             "(без контрольных точек)")
+    parser.add_argument('--compact', action='store_true',
+                        help="хранить токены каталога номерами из словаря (меньше памяти)")
+    parser.add_argument('--mmap', action='store_true', help="читать каталог через отображение файла в память")
+    parser.add_argument('--index', help="файл сохранённого индекса каталога (создаётся и обновляется)")
+    parser.add_argument('--pair-cache', metavar='FILE',
+                        help="файл кеша схожести пар между запусками (создаётся и обновляется)")
+    parser.add_argument('--pair-cache-size', type=int, help="наибольшее число пар в кеше")
+    args = parser.parse_args()
+    
+    if not 0.0 < args.threshold <= 1.0:
+        parser.error("порог схожести должен быть в интервале (0, 1]")
+    
+    SIMILARITY_THRESHOLD = args.threshold
+    SEQUENCE_BACKEND = args.sequence_backend
+    
+    output_filename = args.output
+    if output_filename is None:
+        if args.self_dedup:
+            output_filename = 'task_algorythms_1/clusters.json'
+        elif args.format == 'ndjson':
+            output_filename = 'task_algorythms_1/duplicates.ndjson'
+        else:
+            output_filename = 'task_algorythms_1/duplicates.json'
+    
+    if args.profile:
+        enable_profiling()
+    if args.pair_cache:
+        enable_pair_cache(args.pair_cache, args.pair_cache_size)
+    
+    lsh = MinHashLSH(LSH_BANDS, LSH_ROWS) if args.mode == 'lsh' else None
+    ngrams = NGramIndex(NGRAM_SIZE) if args.mode == 'ngram' else None
+    stats = Counter()
+    
+    try:
+        if args.index:
+            catalog = open_catalog_index(args.index, args.catalog, lsh, use_mmap=args.mmap,
+                                         compact=args.compact, ngrams=ngrams)
+        else:
+            catalog = build_catalog_index(args.catalog, lsh, use_mmap=args.mmap, compact=args.compact, ngrams=ngrams)
+        
+        if args.self_dedup:
+            clusters = find_catalog_clusters(catalog, prune=args.prune, stats=stats, backend=args.backend)
+            with open(output_filename, 'w', encoding='utf-8') as f:
+                json.dump(clusters, f, ensure_ascii=False, indent=2)
+            print(f"Найдено групп дубликатов: {len(clusters)}")
+        else:
+            run_duplicates_job(args.new_items, catalog, output_filename, args.format, args.resume, args.mode,
+                               args.workers, args.backend, args.prune, stats, args.top_k, args.batch_size,
+                               args.catalog, not args.quiet, args.checkpoint_interval)
+    except FileNotFoundError as e:
+        print(f"Файл {e.filename} не найден!")
+        raise SystemExit(1)
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        raise SystemExit(1)
+    except KeyboardInterrupt:
+        if args.self_dedup:
+            raise
+        print("\nПрервано; продолжить можно с флагом --resume")
+        raise SystemExit(130)
+    
+    if args.pair_cache:
+        PAIR_CACHE.save(args.pair_cache)
     
-    duplicates = find_duplicates(new_items, catalog)
+    if args.stats:
+        for stage, count in sorted(stats.items()):
+            print(f"{stage}: {count}")
     
-    with open('task_algorythms_1/duplicates.json', 'w', encoding='utf-8') as f:
-        json.dump(duplicates, f, ensure_ascii=False, indent=2)
+    if args.profile:
+        PROFILER.add_pruning_stats(stats)
+        PROFILER.dump(args.profile)
 
 if __name__ == "__main__":
     main()
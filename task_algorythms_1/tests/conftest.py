@@ -0,0 +1,57 @@
+import pytest
+import os
+import sys
+
+# Добавляем корневую директорию в PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import task
+from benchmark import generate_catalog, generate_new_items
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Названия без токенов: короче двух символов или только из знаков препинания
+UNTOKENIZED_NAMES = ["a", "A", "!!!", "?", "б"]
+
+@pytest.fixture(autouse=True)
+def default_settings(monkeypatch):
+    """Параметры модуля task по умолчанию; тест может менять их через monkeypatch"""
+    monkeypatch.setattr(task, "SIMILARITY_THRESHOLD", 0.8)
+    monkeypatch.setattr(task, "SEQUENCE_BACKEND", "sequencematcher")
+    monkeypatch.setattr(task, "PAIR_CACHE", None)
+
+@pytest.fixture
+def catalog_file():
+    return os.path.join(DATA_DIR, "catalog.txt")
+
+@pytest.fixture
+def new_items_file():
+    return os.path.join(DATA_DIR, "new_items.txt")
+
+@pytest.fixture
+def catalog(catalog_file):
+    """Каталог из catalog.txt"""
+    return task.load_catalog(catalog_file)
+
+@pytest.fixture
+def new_items(new_items_file):
+    """Новые товары из new_items.txt"""
+    return task.load_catalog(new_items_file)
+
+@pytest.fixture
+def untokenized_names():
+    return list(UNTOKENIZED_NAMES)
+
+@pytest.fixture
+def generated_catalog():
+    """Синтетический каталог с товарами без токенов"""
+    catalog = generate_catalog(150, seed=7)
+    catalog.update((f"empty{i}", name) for i, name in enumerate(UNTOKENIZED_NAMES))
+    return catalog
+
+@pytest.fixture
+def generated_new_items(generated_catalog):
+    """Новые товары для синтетического каталога, половина - искажённые копии"""
+    new_items = generate_new_items(generated_catalog, 40, seed=8)
+    new_items.update((f"new_empty{i}", name) for i, name in enumerate(["a", "!!!", "ц"]))
+    return new_items
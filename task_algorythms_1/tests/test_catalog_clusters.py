@@ -0,0 +1,98 @@
+import itertools
+
+import pytest
+
+import task
+from benchmark import generate_catalog, generate_new_items
+
+THRESHOLDS = [0.8, 0.6, task.max_similarity_for_jaccard(0.0), 0.3]
+
+@pytest.fixture
+def self_catalog(untokenized_names):
+    """Каталог с искажёнными копиями собственных товаров и товарами без токенов"""
+    catalog = generate_catalog(80, seed=7)
+    catalog.update(generate_new_items(catalog, 40, seed=8))
+    catalog.update((f"empty{i}", name) for i, name in enumerate(untokenized_names))
+    return catalog
+
+def reference_clusters(catalog):
+    """Эталон: система непересекающихся множеств по всем парам каталога"""
+    ids = list(catalog)
+    features = [task.extract_features(catalog[catalog_id]) for catalog_id in ids]
+    parents = list(range(len(ids)))
+    
+    def find(position):
+        while parents[position] != position:
+            position = parents[position]
+        return position
+    
+    for first, second in itertools.combinations(range(len(ids)), 2):
+        if task.calculate_features_similarity(features[first], features[second]) >= task.SIMILARITY_THRESHOLD:
+            root, other_root = find(first), find(second)
+            parents[max(root, other_root)] = min(root, other_root)
+    
+    groups = {}
+    for position in range(len(ids)):
+        groups.setdefault(find(position), []).append(ids[position])
+    return [{"representative_id": members[0], "ids": members}
+            for _, members in sorted(groups.items()) if len(members) > 1]
+
+class TestCatalogClusters:
+    """Группы дубликатов внутри каталога"""
+
+    @pytest.mark.parametrize("threshold", THRESHOLDS)
+    def test_same_as_all_pairs(self, monkeypatch, self_catalog, threshold):
+        monkeypatch.setattr(task, "SIMILARITY_THRESHOLD", threshold)
+        expected = reference_clusters(self_catalog)
+        assert expected
+
+        assert task.find_catalog_clusters(self_catalog) == expected
+        assert task.find_catalog_clusters(self_catalog, prune=False) == expected
+        assert task.find_catalog_clusters(task.CatalogIndex(self_catalog, compact=True)) == expected
+
+    @pytest.mark.parametrize("threshold", [0.8, 0.3])
+    def test_numpy_backend(self, monkeypatch, self_catalog, threshold):
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(task, "SIMILARITY_THRESHOLD", threshold)
+
+        assert (task.find_catalog_clusters(self_catalog, backend='numpy')
+                == task.find_catalog_clusters(self_catalog))
+
+    def test_fixture_clusters(self, catalog):
+        catalog = dict(catalog)
+        catalog["1101"] = "Xiaomi Redmi Note 12 Pro 8/256 Синий"
+
+        assert task.find_catalog_clusters(catalog) == [{"representative_id": "1001", "ids": ["1001", "1101"]}]
+
+    @pytest.mark.parametrize("min_jaccard", [0.2, 0.5, 0.8, 1.0])
+    def test_prefix_blocking_keeps_similar_pairs(self, self_catalog, min_jaccard):
+        """Каждая пара с коэффициентом Жаккара не ниже min_jaccard попадает в кандидаты"""
+        index = task.CatalogIndex(self_catalog)
+        candidates = dict(task.iter_prefix_candidates(index, min_jaccard))
+
+        for first, second in itertools.combinations(index.live_positions(), 2):
+            features, other_features = index.features[first], index.features[second]
+            if not features.tokens and not other_features.tokens:
+                # Товары без токенов сравниваются только с такими же нормализованными названиями
+                similar = features.normalized == other_features.normalized
+            else:
+                similar = task.calculate_jaccard_similarity(features.tokens, other_features.tokens) >= min_jaccard
+            if similar:
+                assert first in candidates[second]
+
+    def test_prefix_blocking_prunes(self, self_catalog):
+        index = task.CatalogIndex(self_catalog)
+        pairs = sum(len(found) for _, found in task.iter_prefix_candidates(index, 0.5))
+
+        assert pairs < len(index) * (len(index) - 1) // 2
+
+    @pytest.mark.parametrize("min_jaccard", [0.0, -0.1])
+    def test_prefix_blocking_fallback(self, self_catalog, min_jaccard):
+        """При min_jaccard <= 0 кандидатами становятся все более ранние товары"""
+        index = task.CatalogIndex(self_catalog)
+        index.remove("3")
+        live = index.live_positions()
+
+        candidates = list(task.iter_prefix_candidates(index, min_jaccard))
+
+        assert candidates == [(position, live[:number]) for number, position in enumerate(live)]
@@ -0,0 +1,117 @@
+import pytest
+
+import task
+
+def write_catalog(path, records):
+    path.write_text(''.join(f"{catalog_id} {name}\n" for catalog_id, name in records), encoding='utf-8')
+
+def index_state(index):
+    """Товары индекса в порядке каталога: id, нормализованное название, токены-строки"""
+    return [(index.ids[position], index.features[position].normalized,
+             sorted(index.token_strings(index.features[position].tokens)))
+            for position in index.live_positions()]
+
+@pytest.fixture(params=[False, True], ids=["plain", "compact"])
+def compact(request):
+    return request.param
+
+class TestCatalogIndex:
+    """Сохранение, загрузка и обновление индекса каталога"""
+
+    def test_save_load_roundtrip(self, tmp_path, compact, generated_catalog, generated_new_items):
+        index = task.CatalogIndex(generated_catalog, compact=compact)
+        filename = str(tmp_path / "index.pkl")
+        index.save(filename)
+
+        loaded = task.CatalogIndex.load(filename)
+
+        assert (loaded.vocabulary is not None) == compact
+        assert index_state(loaded) == index_state(index)
+        assert (task.find_duplicates(generated_new_items, loaded)
+                == task.find_duplicates(generated_new_items, generated_catalog))
+
+    def test_load_rejects_other_version(self, tmp_path, catalog):
+        filename = str(tmp_path / "index.pkl")
+        task.CatalogIndex(catalog).save(filename)
+        with open(filename, 'rb') as f:
+            state = task.pickle.load(f)
+        state["version"] = task.INDEX_FORMAT_VERSION - 1
+        with open(filename, 'wb') as f:
+            task.pickle.dump(state, f)
+
+        with pytest.raises(ValueError):
+            task.CatalogIndex.load(filename)
+
+    def test_update(self, compact, catalog, new_items):
+        index = task.CatalogIndex(catalog, compact=compact)
+
+        stats = index.update([("1001", catalog["1001"]), ("1002", "Телефон Honor X9b 8/256GB"),
+                              ("3001", "Планшет Apple iPad 10.9 64GB")], ["1003", "9999"])
+
+        assert stats == {"added": 1, "updated": 1, "unchanged": 1, "removed": 1}
+        expected = dict(catalog)
+        expected["1002"] = "Телефон Honor X9b 8/256GB"
+        del expected["1003"]
+        expected["3001"] = "Планшет Apple iPad 10.9 64GB"
+        assert index_state(index) == index_state(task.CatalogIndex(expected, compact=compact))
+        assert task.find_duplicates(new_items, index) == task.find_duplicates(new_items, expected)
+
+    def test_compact_removes_gaps(self, compact, generated_catalog, generated_new_items):
+        index = task.CatalogIndex(generated_catalog, compact=compact)
+        removed = list(generated_catalog)[::3]
+        index.update(removals=removed)
+        expected = {catalog_id: name for catalog_id, name in generated_catalog.items() if catalog_id not in removed}
+        before = task.find_duplicates(generated_new_items, index)
+
+        index.compact()
+
+        assert len(index.ids) == len(index) == len(expected)
+        assert index_state(index) == index_state(task.CatalogIndex(expected, compact=compact))
+        assert task.find_duplicates(generated_new_items, index) == before
+
+    def test_sync(self, tmp_path, compact, catalog):
+        index = task.CatalogIndex(catalog, compact=compact)
+        changed = dict(catalog)
+        changed["1001"] = "Смартфон Xiaomi Redmi Note 13 Pro 8/256GB синий"
+        del changed["1004"]
+        changed["3001"] = "Планшет Apple iPad 10.9 64GB"
+        catalog_file = tmp_path / "catalog.txt"
+        write_catalog(catalog_file, changed.items())
+
+        stats = index.sync(task.iter_catalog_chunks(str(catalog_file), chunk_size=2))
+
+        assert stats == {"added": 1, "updated": 1, "unchanged": len(catalog) - 2, "removed": 1}
+        assert sorted(index_state(index)) == sorted(index_state(task.CatalogIndex(changed, compact=compact)))
+
+    def test_open_catalog_index_syncs_saved_index(self, tmp_path, compact, catalog):
+        catalog_file = tmp_path / "catalog.txt"
+        index_file = str(tmp_path / "index.pkl")
+        write_catalog(catalog_file, catalog.items())
+        task.open_catalog_index(index_file, str(catalog_file), compact=compact)
+
+        changed = dict(catalog)
+        changed["3001"] = "Планшет Apple iPad 10.9 64GB"
+        write_catalog(catalog_file, changed.items())
+        index = task.open_catalog_index(index_file, str(catalog_file), compact=compact)
+
+        assert index_state(index) == index_state(task.CatalogIndex(changed, compact=compact))
+        assert index_state(task.CatalogIndex.load(index_file)) == index_state(index)
+
+    @pytest.mark.parametrize("content", [b"", b"not a pickle", b"\x80\x05\x95\x10"], ids=["empty", "garbage", "truncated"])
+    def test_open_catalog_index_rebuilds_corrupt_file(self, tmp_path, catalog, catalog_file, content):
+        index_file = tmp_path / "index.pkl"
+        index_file.write_bytes(content)
+
+        index = task.open_catalog_index(str(index_file), catalog_file)
+
+        assert index_state(index) == index_state(task.CatalogIndex(catalog))
+        assert index_state(task.CatalogIndex.load(str(index_file))) == index_state(index)
+
+    def test_open_catalog_index_rebuilds_other_representation(self, tmp_path, catalog, catalog_file):
+        index_file = str(tmp_path / "index.pkl")
+        task.CatalogIndex(catalog).save(index_file)
+
+        index = task.open_catalog_index(index_file, catalog_file, compact=True)
+
+        assert index.vocabulary is not None
+        assert index_state(index) == index_state(task.CatalogIndex(catalog))
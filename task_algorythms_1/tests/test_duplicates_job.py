@@ -0,0 +1,135 @@
+import json
+import os
+
+import pytest
+
+import task
+from checkpoint import checkpoint_filename, partial_filename
+
+def write_items(path, items):
+    path.write_text(''.join(f"{item_id} {name}\n" for item_id, name in items.items()), encoding='utf-8')
+    return str(path)
+
+@pytest.fixture
+def job_files(tmp_path, generated_catalog, generated_new_items):
+    """Файлы каталога и новых товаров и построенный по каталогу индекс"""
+    catalog_file = write_items(tmp_path / "catalog.txt", generated_catalog)
+    new_items_file = write_items(tmp_path / "new_items.txt", generated_new_items)
+    return catalog_file, new_items_file, task.build_catalog_index(catalog_file)
+
+def interrupt_after(monkeypatch, count, error=KeyboardInterrupt):
+    """Подменяет iter_duplicates так, что после count результатов приходит Ctrl+C (или error)"""
+    original = task.iter_duplicates
+    
+    def interrupted(*args, **kwargs):
+        for number, result in enumerate(original(*args, **kwargs)):
+            if number == count:
+                raise error
+            yield result
+    
+    monkeypatch.setattr(task, "iter_duplicates", interrupted)
+    return lambda: monkeypatch.setattr(task, "iter_duplicates", original)
+
+def results_filename(output_filename, output_format):
+    """Файл, в который пишутся результаты до завершения: NDJSON сразу пишется в итоговый"""
+    return output_filename if output_format == 'ndjson' else partial_filename(output_filename)
+
+def run_job(job_files, output_filename, **options):
+    catalog_file, new_items_file, index = job_files
+    return task.run_duplicates_job(new_items_file, index, output_filename, catalog_filename=catalog_file,
+                                   progress=False, batch_size=7, **options)
+
+class TestDuplicatesJob:
+    """Прерывание и продолжение поиска дубликатов"""
+
+    @pytest.mark.parametrize("workers", [1, 3])
+    @pytest.mark.parametrize("output_format", ["pretty", "ndjson"])
+    def test_resume_matches_full_run(self, monkeypatch, tmp_path, job_files, generated_new_items,
+                                     workers, output_format):
+        expected_file = str(tmp_path / "expected.json")
+        run_job(job_files, expected_file, output_format=output_format, workers=workers)
+        
+        output_file = str(tmp_path / "duplicates.json")
+        restore = interrupt_after(monkeypatch, 25)
+        with pytest.raises(KeyboardInterrupt):
+            run_job(job_files, output_file, output_format=output_format, workers=workers)
+        restore()
+        
+        partial = results_filename(output_file, output_format)
+        with open(checkpoint_filename(output_file), encoding='utf-8') as f:
+            state = json.load(f)
+        with open(partial, encoding='utf-8') as f:
+            lines = f.readlines()
+        # Итоговый файл pretty появляется только в конце, NDJSON читается во время работы
+        assert not os.path.exists(output_file if output_format != 'ndjson' else partial_filename(output_file))
+        assert state["processed"] == len(lines) == 25
+        assert state["offset"] == os.path.getsize(partial)
+        assert [json.loads(line)["new_item_id"] for line in lines] == list(generated_new_items)[:25]
+        
+        assert run_job(job_files, output_file, output_format=output_format, workers=workers,
+                       resume=True) == len(generated_new_items)
+        
+        with open(output_file, 'rb') as f, open(expected_file, 'rb') as expected:
+            assert f.read() == expected.read()
+        assert not os.path.exists(partial_filename(output_file))
+        assert not os.path.exists(checkpoint_filename(output_file))
+
+    @pytest.mark.parametrize("output_format", ["pretty", "ndjson"])
+    def test_resume_drops_lines_after_checkpoint(self, monkeypatch, tmp_path, job_files, output_format):
+        """Строки, дописанные после контрольной точки (например, перед kill -9), считаются заново"""
+        expected_file = str(tmp_path / "expected.json")
+        run_job(job_files, expected_file, output_format=output_format)
+        
+        output_file = str(tmp_path / "duplicates.json")
+        restore = interrupt_after(monkeypatch, 10)
+        with pytest.raises(KeyboardInterrupt):
+            run_job(job_files, output_file, output_format=output_format)
+        restore()
+        with open(results_filename(output_file, output_format), 'a', encoding='utf-8') as f:
+            f.write('{"new_item_id": "unfinished", "dupl')
+        
+        run_job(job_files, output_file, output_format=output_format, resume=True)
+        
+        with open(output_file, 'rb') as f, open(expected_file, 'rb') as expected:
+            assert f.read() == expected.read()
+
+    def test_resume_after_crash(self, monkeypatch, tmp_path, job_files):
+        """Без Ctrl+C продолжение идёт с последней периодической контрольной точки"""
+        expected_file = str(tmp_path / "expected.json")
+        run_job(job_files, expected_file)
+        
+        output_file = str(tmp_path / "duplicates.json")
+        restore = interrupt_after(monkeypatch, 15, RuntimeError)
+        with pytest.raises(RuntimeError):
+            run_job(job_files, output_file, checkpoint_interval=0.0)
+        restore()
+        with open(checkpoint_filename(output_file), encoding='utf-8') as f:
+            state = json.load(f)
+        assert state["processed"] == 15
+        assert state["offset"] == os.path.getsize(partial_filename(output_file))
+        
+        run_job(job_files, output_file, resume=True)
+        
+        with open(output_file, 'rb') as f, open(expected_file, 'rb') as expected:
+            assert f.read() == expected.read()
+
+    def test_changed_parameters_start_over(self, monkeypatch, tmp_path, job_files, generated_new_items):
+        """Контрольная точка запуска с другими параметрами не используется"""
+        output_file = str(tmp_path / "duplicates.json")
+        restore = interrupt_after(monkeypatch, 10)
+        with pytest.raises(KeyboardInterrupt):
+            run_job(job_files, output_file, top_k=1)
+        restore()
+        
+        processed = []
+        original = task.iter_duplicates
+        
+        def counted(new_items, *args, **kwargs):
+            for result in original(new_items, *args, **kwargs):
+                processed.append(result[0])
+                yield result
+        
+        monkeypatch.setattr(task, "iter_duplicates", counted)
+        run_job(job_files, output_file, resume=True)
+        
+        assert processed == list(generated_new_items)
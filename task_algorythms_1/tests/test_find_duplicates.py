@@ -0,0 +1,142 @@
+import re
+
+import pytest
+
+import task
+
+# Пороги выше и ниже max_similarity_for_jaccard(0.0): при низком пороге
+# проходят даже пары без общих токенов
+THRESHOLDS = [0.8, 0.6, task.max_similarity_for_jaccard(0.0), 0.4, 0.3]
+
+def brute_force(new_items, catalog):
+    """Эталон: полная схожесть всех пар, без индекса и отсечений"""
+    catalog_features = [(catalog_id, task.extract_features(name)) for catalog_id, name in catalog.items()]
+    results = {}
+    for new_id, new_name in new_items.items():
+        features = task.extract_features(new_name)
+        duplicates = []
+        for catalog_id, other in catalog_features:
+            similarity = task.calculate_features_similarity(features, other)
+            if similarity >= task.SIMILARITY_THRESHOLD:
+                duplicates.append({"catalog_id": catalog_id, "similarity_score": round(similarity, 2)})
+        duplicates.sort(key=lambda x: x["similarity_score"], reverse=True)
+        results[new_id] = duplicates
+    return results
+
+class TestExactMode:
+    """Режим 'exact' находит те же дубликаты, что и перебор всех пар"""
+
+    def test_threshold_bounds(self):
+        assert task.max_similarity_for_jaccard(0.0) < 0.8
+        assert task.min_jaccard_for_threshold(0.3) == 0.0
+
+    def test_fixtures(self, new_items, catalog):
+        result = task.find_duplicates(new_items, catalog, mode='exact')
+
+        assert result == brute_force(new_items, catalog)
+        assert result["2001"] == [{"catalog_id": "1001", "similarity_score": 0.89}]
+
+    @pytest.mark.parametrize("threshold", THRESHOLDS)
+    def test_fixtures_thresholds(self, monkeypatch, new_items, catalog, threshold):
+        monkeypatch.setattr(task, "SIMILARITY_THRESHOLD", threshold)
+
+        assert task.find_duplicates(new_items, catalog, mode='exact') == brute_force(new_items, catalog)
+
+    @pytest.mark.parametrize("threshold", THRESHOLDS)
+    def test_generated_catalog(self, monkeypatch, generated_new_items, generated_catalog, threshold):
+        monkeypatch.setattr(task, "SIMILARITY_THRESHOLD", threshold)
+        expected = brute_force(generated_new_items, generated_catalog)
+        assert any(expected.values())
+
+        assert task.find_duplicates(generated_new_items, generated_catalog, mode='exact') == expected
+        assert task.find_duplicates(generated_new_items, generated_catalog, mode='brute') == expected
+
+    def test_untokenized_names(self, generated_catalog):
+        """Названия без токенов совпадают только с такими же нормализованными названиями"""
+        result = task.find_duplicates({"x": "!!!", "y": "a", "z": "ц"}, generated_catalog, mode='exact')
+
+        assert task.extract_features("!!!").tokens == frozenset()
+        assert [match["catalog_id"] for match in result["x"]] == ["empty2", "empty3"]
+        assert [match["catalog_id"] for match in result["y"]] == ["empty0", "empty1"]
+        assert result["z"] == []
+
+class TestEquivalentOptions:
+    """Параметры ускорения не меняют результат"""
+
+    @pytest.mark.parametrize("threshold", [0.8, 0.4])
+    @pytest.mark.parametrize("top_k", [1, 2, 5])
+    def test_top_k_is_prefix(self, monkeypatch, generated_new_items, generated_catalog, threshold, top_k):
+        """top_k даёт первые k совпадений полного списка"""
+        monkeypatch.setattr(task, "SIMILARITY_THRESHOLD", threshold)
+        full = task.find_duplicates(generated_new_items, generated_catalog)
+
+        result = task.find_duplicates(generated_new_items, generated_catalog, top_k=top_k)
+
+        assert result == {new_id: matches[:top_k] for new_id, matches in full.items()}
+
+    @pytest.mark.parametrize("threshold", [0.8, 0.4])
+    @pytest.mark.parametrize("options", [
+        {"workers": 2},
+        {"workers": 3, "top_k": 2},
+        {"backend": "numpy"},
+        {"backend": "numpy", "workers": 2},
+        {"prune": False},
+        {"prune": False, "top_k": 2},
+    ], ids=lambda options: ','.join(f"{key}={value}" for key, value in options.items()))
+    def test_same_as_default(self, monkeypatch, generated_new_items, generated_catalog, threshold, options):
+        if options.get("backend") == "numpy":
+            pytest.importorskip("numpy")
+        monkeypatch.setattr(task, "SIMILARITY_THRESHOLD", threshold)
+        expected = task.find_duplicates(generated_new_items, generated_catalog, top_k=options.get("top_k"))
+
+        assert task.find_duplicates(generated_new_items, generated_catalog, **options) == expected
+
+    def test_compact_index(self, generated_new_items, generated_catalog):
+        index = task.CatalogIndex(generated_catalog, compact=True)
+
+        assert (task.find_duplicates(generated_new_items, index)
+                == task.find_duplicates(generated_new_items, generated_catalog))
+
+# Шаблоны характеристик до предварительного извлечения сигнатур
+LEGACY_SPEC_PATTERNS = [r'^\d+/\d+$', r'^\d+\.\d+$', r'^\d+дюйм$', r'^\d+гб$', r'^\d+мм$', r'^\d+$']
+
+def legacy_specifications(tokens):
+    return {token for token in tokens if any(re.match(pattern, token) for pattern in LEGACY_SPEC_PATTERNS)}
+
+class TestSpecSignature:
+    """Сигнатура характеристик совпадает с прежней проверкой по шаблонам"""
+
+    def test_same_as_pattern_loop(self, generated_catalog, generated_new_items):
+        features = [task.extract_features(name)
+                    for name in list(generated_catalog.values()) + list(generated_new_items.values())]
+
+        for item in features:
+            assert item.specs.values == legacy_specifications(item.tokens)
+        for first, second in zip(features, features[1:]):
+            expected = bool(legacy_specifications(first.tokens) & legacy_specifications(second.tokens))
+            assert first.specs.matches(second.specs) == expected
+
+    def test_tokens(self):
+        assert legacy_specifications({"10.1", "4/64", "256гб", "a1", "46мм", "12"}) == \
+            task.extract_specifications({"10.1", "4/64", "256гб", "a1", "46мм", "12"})
+
+    @pytest.mark.parametrize("name, memory, screen, capacity", [
+        ("Смартфон Xiaomi Redmi Note 12 Pro 8/256GB синий", {"8/256"}, set(), {"256гб"}),
+        ('Планшет Irbis TX97 10.1" 4/64GB', {"4/64"}, {"10.1"}, {"64гб"}),
+        ("Планшет IRBIS TX97 10,1 дюйм 4/64 ГБ", {"4/64"}, {"10.1"}, {"64гб"}),
+        ("Монитор Xiaomi 2 27 дюймов", set(), {"27"}, set()),
+        ("Телевизор 55 inch 1TB", set(), {"55"}, {"1тб"}),
+        ("Часы Apple Watch 45мм", set(), set(), set()),
+    ])
+    def test_typed_fields(self, name, memory, screen, capacity):
+        specs = task.extract_features(name).specs
+
+        assert (specs.memory, specs.screen, specs.capacity) == (memory, screen, capacity)
+
+    def test_blocking_key(self):
+        catalog_specs = task.extract_features('Планшет Irbis TX97 10.1" 4/64GB').specs
+        new_specs = task.extract_features("Планшет IRBIS TX97 10.1 дюйм 4/64 ГБ").specs
+
+        assert catalog_specs.blocking_key() == (("4/64",), ("10.1",), ("64гб",))
+        assert new_specs.blocking_key() == catalog_specs.blocking_key()
+        assert task.extract_features("Монитор Xiaomi 2 27 дюймов").specs.blocking_key() == ((), ("27",), ())
@@ -0,0 +1,85 @@
+import pytest
+
+import task
+from lsh import MinHashLSH
+
+def bucket_ids(index):
+    """LSH-бакеты индекса с id товаров вместо позиций"""
+    return [{key: sorted(index.ids[position] for position in bucket) for key, bucket in buckets.items()}
+            for buckets in index.lsh.buckets]
+
+def fresh_buckets(catalog):
+    return bucket_ids(task.CatalogIndex(catalog, lsh=MinHashLSH(task.LSH_BANDS, task.LSH_ROWS)))
+
+class TestMinHashLSH:
+    """Тесты MinHash + LSH"""
+
+    def test_remove_undoes_add(self):
+        lsh = MinHashLSH(task.LSH_BANDS, task.LSH_ROWS)
+        lsh.add(0, {"xiaomi", "redmi", "12"})
+        before = [dict((key, list(bucket)) for key, bucket in buckets.items()) for buckets in lsh.buckets]
+
+        lsh.add(1, {"xiaomi", "redmi", "13"})
+        lsh.add(2, {"huawei"})
+        lsh.remove(1, {"xiaomi", "redmi", "13"})
+        lsh.remove(2, {"huawei"})
+
+        assert lsh.buckets == before
+        assert lsh.query({"xiaomi", "redmi", "12"}) == {0}
+        lsh.remove(0, {"xiaomi", "redmi", "12"})
+        assert lsh.buckets == [{} for _ in range(task.LSH_BANDS)]
+
+    def test_identical_sets_collide(self):
+        lsh = MinHashLSH(task.LSH_BANDS, task.LSH_ROWS)
+        lsh.add(0, {"a1", "b2", "c3"})
+
+        assert lsh.query({"c3", "b2", "a1"}) == {0}
+        assert lsh.query(set()) == set()
+
+    def test_recall_report(self, generated_new_items, generated_catalog):
+        report = task.lsh_recall_report(generated_new_items, generated_catalog)
+        exact = task.find_duplicates(generated_new_items, generated_catalog, mode='exact')
+        approximate = task.find_duplicates(generated_new_items, generated_catalog, mode='lsh')
+
+        exact_pairs = {(new_id, match["catalog_id"], match["similarity_score"])
+                       for new_id, matches in exact.items() for match in matches}
+        found_pairs = {(new_id, match["catalog_id"], match["similarity_score"])
+                       for new_id, matches in approximate.items() for match in matches}
+        assert found_pairs <= exact_pairs
+        assert report["exact_pairs"] == len(exact_pairs) > 0
+        assert report["found_pairs"] == len(found_pairs)
+        assert 0.0 < report["recall"] <= 1.0
+        assert 0.0 < report["expected_recall_at_min_jaccard"] <= 1.0
+
+class TestIndexBuckets:
+    """LSH-бакеты индекса соответствуют его товарам"""
+
+    def test_update_and_compact(self, generated_catalog, generated_new_items):
+        index = task.CatalogIndex(generated_catalog, lsh=MinHashLSH(task.LSH_BANDS, task.LSH_ROWS))
+        removed = list(generated_catalog)[::4]
+        changed = list(generated_catalog)[1::4]
+        index.update([(catalog_id, generated_catalog[catalog_id] + " синий") for catalog_id in changed]
+                     + [("added", "Смартфон Samsung Galaxy S 24 8/256gb черный")], removed)
+        expected = {catalog_id: name for catalog_id, name in generated_catalog.items() if catalog_id not in removed}
+        expected.update((catalog_id, generated_catalog[catalog_id] + " синий") for catalog_id in changed)
+        expected["added"] = "Смартфон Samsung Galaxy S 24 8/256gb черный"
+
+        assert bucket_ids(index) == fresh_buckets(expected)
+        lsh_before = task.find_duplicates(generated_new_items, index, mode='lsh')
+
+        index.compact()
+
+        assert bucket_ids(index) == fresh_buckets(expected)
+        assert task.find_duplicates(generated_new_items, index, mode='lsh') == lsh_before
+        assert lsh_before == task.find_duplicates(generated_new_items, expected, mode='lsh')
+
+    @pytest.mark.parametrize("compact", [False, True], ids=["plain", "compact"])
+    def test_load_with_lsh(self, tmp_path, generated_catalog, generated_new_items, compact):
+        filename = str(tmp_path / "index.pkl")
+        task.CatalogIndex(generated_catalog, compact=compact).save(filename)
+
+        index = task.CatalogIndex.load(filename, lsh=MinHashLSH(task.LSH_BANDS, task.LSH_ROWS))
+
+        assert bucket_ids(index) == fresh_buckets(generated_catalog)
+        assert (task.find_duplicates(generated_new_items, index, mode='lsh')
+                == task.find_duplicates(generated_new_items, generated_catalog, mode='lsh'))
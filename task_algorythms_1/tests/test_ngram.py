@@ -0,0 +1,57 @@
+import pytest
+
+import task
+from ngram import NGramIndex
+
+def fresh_ngram_index(catalog):
+    return task.CatalogIndex(catalog, ngrams=NGramIndex(task.NGRAM_SIZE))
+
+class TestNGramBackend:
+    """Схожесть по n-граммам откалибрована под шкалу SequenceMatcher"""
+
+    def test_calibrated_exponent(self, new_items, catalog):
+        assert task.calibrate_ngram_exponent(new_items, catalog) == task.NGRAM_EXPONENT
+
+    @pytest.mark.parametrize("mode", ["exact", "ngram"])
+    def test_fixture_scores(self, monkeypatch, new_items, catalog, mode):
+        expected = task.find_duplicates(new_items, catalog)
+        monkeypatch.setattr(task, "SEQUENCE_BACKEND", "ngram")
+
+        result = task.find_duplicates(new_items, catalog, mode=mode)
+
+        # Найденные SequenceMatcher дубликаты сохраняются с близкой оценкой
+        for new_id, matches in expected.items():
+            scores = {match["catalog_id"]: match["similarity_score"] for match in result[new_id]}
+            for match in matches:
+                assert scores[match["catalog_id"]] == pytest.approx(match["similarity_score"], abs=0.02)
+        assert result == {
+            "2001": [{"catalog_id": "1001", "similarity_score": 0.88}],
+            "2002": [{"catalog_id": "1002", "similarity_score": 0.84}],
+            "2003": [],
+            "2004": [],
+            "2005": [{"catalog_id": "1004", "similarity_score": 0.82}],
+        }
+
+class TestNGramIndex:
+    """Индекс n-грамм соответствует товарам каталога"""
+
+    def test_update_remove_and_compact(self, generated_catalog, generated_new_items):
+        index = fresh_ngram_index(generated_catalog)
+        removed = list(generated_catalog)[::4]
+        changed = list(generated_catalog)[1::4]
+        index.update([(catalog_id, generated_catalog[catalog_id] + " синий") for catalog_id in changed]
+                     + [("added", "Смартфон Samsung Galaxy S 24 8/256gb черный")], removed)
+        index.remove(changed[0])
+        expected = {catalog_id: name for catalog_id, name in generated_catalog.items() if catalog_id not in removed}
+        expected.update((catalog_id, generated_catalog[catalog_id] + " синий") for catalog_id in changed)
+        expected["added"] = "Смартфон Samsung Galaxy S 24 8/256gb черный"
+        del expected[changed[0]]
+
+        result = task.find_duplicates(generated_new_items, index, mode='ngram')
+        assert any(result.values())
+        assert result == task.find_duplicates(generated_new_items, fresh_ngram_index(expected), mode='ngram')
+
+        index.compact()
+
+        assert len(index.ngrams) == len(expected)
+        assert task.find_duplicates(generated_new_items, index, mode='ngram') == result
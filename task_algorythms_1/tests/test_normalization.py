@@ -0,0 +1,57 @@
+import random
+import re
+
+import pytest
+
+import task
+from benchmark import generate_catalog, generate_new_items, perturb_name
+
+def legacy_normalize_text(text: str) -> str:
+    """
+    Прежняя нормализация: таблицы применяются по очереди, единицы -
+    отдельным регулярным выражением на каждую.
+    """
+    text = task.apply_replacements(text.lower(), [task.COLOR_MAPPING])
+    
+    for unit, replacement in task.UNIT_MAPPING.items():
+        pattern = r'(^|\s)' + re.escape(unit) + r'($|\s)'
+        text = re.sub(pattern, f'\\1{replacement}\\2', text)
+    
+    text = task.apply_replacements(text, [task.BRAND_MAPPING, task.SYNONYM_MAPPING])
+    
+    text = re.sub(r'[^\w\s\/\+]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    
+    return ' '.join(word for word in text.split() if word not in task.STOP_WORDS)
+
+def generated_names():
+    catalog = generate_catalog(3000, seed=11)
+    names = list(catalog.values()) + list(generate_new_items(catalog, 1000, seed=12).values())
+    rng = random.Random(13)
+    # Искажённые копии: другой регистр, переведённые цвета, пропущенные слова
+    names += [perturb_name(name, rng) for name in names[:1000]]
+    return names
+
+class TestNormalization:
+    """Однопроходная нормализация совпадает с последовательными заменами"""
+
+    def test_fixtures(self, catalog, new_items):
+        for name in list(catalog.values()) + list(new_items.values()):
+            assert task.normalize_text(name) == legacy_normalize_text(name), name
+
+    def test_generated_names(self):
+        for name in generated_names():
+            assert task.normalize_text(name) == legacy_normalize_text(name), name
+
+    @pytest.mark.parametrize("name", [
+        "Xiao Mi Band 8",
+        "Телефон Redmi Note",
+        "Samsung Galaxy Tab 10 inch inch",
+        "Робот-пылесос Vacuum Cleaner",
+        "Smart Watch Honor GT pro",
+        "iPhone 15 Plus + чехол",
+        "Мобильный телефон Mi 11 Grey",
+    ])
+    def test_chained_replacements(self, name):
+        """Замены, результат которых образует вариант из другой таблицы"""
+        assert task.normalize_text(name) == legacy_normalize_text(name)
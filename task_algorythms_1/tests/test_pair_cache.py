@@ -0,0 +1,102 @@
+from collections import Counter
+
+import pytest
+
+import task
+from pair_cache import PairCache
+
+def run(new_items, catalog, **options):
+    """Результат поиска и счётчики этапов отсечения"""
+    stats = Counter()
+    return task.find_duplicates(new_items, catalog, stats=stats, **options), stats
+
+class TestCachedSearch:
+    """Кеш пар не меняет результатов поиска"""
+
+    @pytest.mark.parametrize("options", [{}, {"top_k": 1}, {"workers": 2}, {"top_k": 2, "workers": 2}],
+                             ids=["plain", "top_k", "workers", "top_k_workers"])
+    def test_same_as_uncached(self, generated_new_items, generated_catalog, options):
+        index = task.CatalogIndex(generated_catalog)
+        expected, _ = run(generated_new_items, index, **options)
+        cache = task.enable_pair_cache()
+
+        first, _ = run(generated_new_items, index, **options)
+        second, stats = run(generated_new_items, index, **options)
+
+        assert len(cache) > 0
+        assert first == second == expected
+        assert stats["cached"] > 0
+        assert stats["ratio"] == 0
+
+    def test_second_run_hits(self, generated_new_items, generated_catalog):
+        index = task.CatalogIndex(generated_catalog)
+        task.enable_pair_cache()
+        _, first_stats = run(generated_new_items, index)
+
+        _, stats = run(generated_new_items, index)
+
+        assert first_stats["cached"] == 0
+        assert first_stats["ratio"] > 0
+        # Отсечённые по Жаккару пары в кеш не попадают, остальные находятся в нём
+        assert stats["cached"] == first_stats["pairs"] - first_stats["identical"] - first_stats["pruned_jaccard"]
+        assert stats["ratio"] == stats["pruned_quick_ratio"] == stats["pruned_real_quick_ratio"] == 0
+
+    @pytest.mark.parametrize("setting, value", [("SIMILARITY_THRESHOLD", 0.6), ("SEQUENCE_BACKEND", "ngram")])
+    def test_changed_parameters_miss(self, monkeypatch, generated_new_items, generated_catalog, setting, value):
+        index = task.CatalogIndex(generated_catalog)
+        task.enable_pair_cache()
+        run(generated_new_items, index)
+        monkeypatch.setattr(task, setting, value)
+
+        result, stats = run(generated_new_items, index)
+
+        assert stats["cached"] == 0
+        task.disable_pair_cache()
+        assert result == run(generated_new_items, index)[0]
+
+class TestPairCache:
+    """Тесты хранилища кеша пар"""
+
+    def test_lru_eviction(self):
+        cache = PairCache("params", max_size=2)
+        first, second, third = cache.key("a", "b"), cache.key("a", "c"), cache.key("a", "d")
+        cache.put(first, 0.9)
+        cache.put(second, None)
+
+        assert cache.lookup(first) == (True, 0.9)
+        cache.put(third, 0.85)
+
+        assert len(cache) == 2
+        assert cache.lookup(second) == (False, None)
+        assert cache.lookup(first) == (True, 0.9)
+        assert cache.lookup(third) == (True, 0.85)
+
+    def test_key_depends_on_fingerprint_and_order(self):
+        cache = PairCache("params")
+        key = cache.key("a", "b")
+
+        assert key != cache.key("b", "a")
+        cache.set_fingerprint("other")
+        assert key != cache.key("a", "b")
+
+    def test_save_and_load(self, tmp_path):
+        filename = str(tmp_path / "pairs.pkl")
+        cache = PairCache("params")
+        keys = [cache.key("a", str(i)) for i in range(5)]
+        for i, key in enumerate(keys):
+            cache.put(key, None if i % 2 else i / 10)
+        cache.save(filename)
+
+        loaded = PairCache.load(filename, "params")
+        assert loaded.entries == cache.entries
+        # При меньшем размере остаются самые свежие записи
+        assert list(PairCache.load(filename, "params", max_size=2).entries) == keys[-2:]
+
+    @pytest.mark.parametrize("content", [b"", b"not a pickle", b"\x80\x04K\x01."],
+                             ids=["empty", "garbage", "not_dict"])
+    def test_corrupt_file(self, tmp_path, content):
+        filename = tmp_path / "pairs.pkl"
+        filename.write_bytes(content)
+
+        assert len(PairCache.load(str(filename))) == 0
+        assert len(PairCache.load(str(tmp_path / "missing.pkl"))) == 0
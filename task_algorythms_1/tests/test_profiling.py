@@ -0,0 +1,59 @@
+import pytest
+
+import task
+
+@pytest.fixture
+def profiler():
+    """Включённый профилировщик; выключается и после упавшего теста"""
+    yield task.enable_profiling()
+    task.disable_profiling()
+
+def stage_calls(profiler):
+    return {stage: entry["calls"] for stage, entry in profiler.report()["stages"].items()}
+
+class TestProfiler:
+    """Тесты профилирования этапов поиска"""
+
+    def test_disable_restores_originals(self):
+        normalize_text = task.normalize_text
+        sequence_matcher = task.SequenceMatcher
+        candidates = task.CatalogIndex.__dict__["candidates"]
+
+        task.enable_profiling()
+        try:
+            assert task.normalize_text is not normalize_text
+            assert task.SequenceMatcher is not sequence_matcher
+            assert task.CatalogIndex.__dict__["candidates"] is not candidates
+        finally:
+            task.disable_profiling()
+
+        assert task.normalize_text is normalize_text
+        assert task.SequenceMatcher is sequence_matcher
+        assert task.CatalogIndex.__dict__["candidates"] is candidates
+        assert task.PROFILER is None
+
+    @pytest.mark.parametrize("mode", ["exact", "lsh", "ngram"])
+    def test_results_match_unprofiled(self, profiler, generated_new_items, generated_catalog, mode):
+        profiled = task.find_duplicates(generated_new_items, generated_catalog, mode=mode)
+        task.disable_profiling()
+
+        assert profiled == task.find_duplicates(generated_new_items, generated_catalog, mode=mode)
+
+    def test_workers_report_merged(self, generated_new_items, generated_catalog):
+        # Индекс строится до включения замеров: в отчёт попадает только поиск
+        index = task.CatalogIndex(generated_catalog)
+        profiler = task.enable_profiling()
+        try:
+            task.find_duplicates(generated_new_items, index)
+            expected = stage_calls(profiler)
+            profiler.reset()
+
+            task.find_duplicates(generated_new_items, index, workers=2)
+            calls = stage_calls(profiler)
+        finally:
+            task.disable_profiling()
+
+        assert calls == expected
+        for stage in ("normalize", "tokenize", "specs"):
+            assert calls[stage] == len(generated_new_items)
+        assert calls["sequence_ratio"] > 0
@@ -0,0 +1,98 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import service
+import task
+
+@pytest.fixture
+def test_client(monkeypatch, catalog_file):
+    """Тестовый клиент сервиса с индексом по catalog.txt, без файла индекса"""
+    monkeypatch.setattr(service, "CATALOG_FILE", catalog_file)
+    monkeypatch.setattr(service, "INDEX_FILE", None)
+    monkeypatch.setattr(service, "catalog_index", None)
+    return TestClient(service.app)
+
+def check(test_client, items, **options):
+    response = test_client.post("/duplicates/check", json={
+        "items": [{"id": item_id, "name": name} for item_id, name in items],
+        **options
+    })
+    assert response.status_code == 200
+    return {result["id"]: result["duplicates"] for result in response.json()["results"]}
+
+class TestService:
+    """Тесты сервиса поиска дубликатов"""
+
+    def test_check(self, test_client, new_items, catalog):
+        results = check(test_client, new_items.items())
+
+        assert results == task.find_duplicates(new_items, catalog)
+        assert results["2001"] == [{"catalog_id": "1001", "similarity_score": 0.89}]
+
+    def test_check_top_k(self, test_client, monkeypatch):
+        monkeypatch.setattr(task, "SIMILARITY_THRESHOLD", 0.3)
+        name = "Смартфон Xiaomi Redmi Note 12 Pro 8/256GB синий"
+
+        full = check(test_client, [("x", name)])["x"]
+        assert len(full) > 1
+        assert check(test_client, [("x", name)], top_k=1)["x"] == full[:1]
+
+    def test_check_invalid_top_k(self, test_client):
+        response = test_client.post("/duplicates/check", json={"items": [{"id": "x", "name": "a"}], "top_k": 0})
+
+        assert response.status_code == 400
+
+    def test_batch_size_limit(self, test_client, monkeypatch):
+        monkeypatch.setattr(service, "MAX_BATCH_SIZE", 1)
+        items = [{"id": "x", "name": "a"}, {"id": "y", "name": "b"}]
+
+        assert test_client.post("/duplicates/check", json={"items": items}).status_code == 400
+        assert test_client.put("/catalog/items", json={"items": items}).status_code == 400
+        assert test_client.put("/catalog/items", json={"remove_ids": ["1001", "1002"]}).status_code == 400
+        assert test_client.get("/catalog/items/1001").status_code == 200
+        assert test_client.get("/health").json()["catalog_size"] == 5
+
+    def test_upsert_and_remove(self, test_client):
+        name = "Планшет Apple iPad 10.9 64GB серебристый"
+        response = test_client.put("/catalog/items", json={
+            "items": [{"id": "3001", "name": name}, {"id": "1001", "name": "Смартфон Xiaomi Redmi Note 12 Pro 8/256GB синий"}],
+            "remove_ids": ["1002", "9999"]
+        })
+
+        assert response.status_code == 200
+        assert response.json() == {"added": 1, "updated": 0, "unchanged": 1, "removed": 1}
+        results = check(test_client, [("new", name), ("old", "Huawei P60 Pro 12/512 Black")])
+        assert results["new"] == [{"catalog_id": "3001", "similarity_score": 1.0}]
+        assert results["old"] == []
+
+    def test_read_item(self, test_client):
+        response = test_client.get("/catalog/items/1003")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["normalized_name"] == task.normalize_text('Планшет Irbis TX97 10.1" 4/64GB')
+        assert "irbis" in data["tokens"]
+        assert test_client.get("/catalog/items/9999").status_code == 404
+
+    def test_delete(self, test_client):
+        assert test_client.delete("/catalog/items/1004").status_code == 200
+        assert test_client.get("/catalog/items/1004").status_code == 404
+        assert test_client.delete("/catalog/items/1004").status_code == 404
+        assert test_client.get("/health").json() == {"status": "ok", "catalog_size": 4}
+
+    def test_save_without_index_file(self, test_client):
+        response = test_client.post("/catalog/save")
+
+        assert response.status_code == 400
+        assert "DEDUP_INDEX_FILE" in response.json()["detail"]
+
+    def test_save(self, test_client, monkeypatch, tmp_path):
+        index_file = str(tmp_path / "index.pkl")
+        monkeypatch.setattr(service, "INDEX_FILE", index_file)
+        test_client.delete("/catalog/items/1004")
+
+        response = test_client.post("/catalog/save")
+
+        assert response.status_code == 200
+        assert response.json()["catalog_size"] == 4
+        assert "1004" not in task.CatalogIndex.load(index_file).positions
@@ -0,0 +1,84 @@
+from typing import Dict, Iterator, List, Set, Tuple
+
+import numpy as np
+
+# Ограничение на количество пар (новый товар, позиция) в одном блоке
+MAX_BLOCK_ENTRIES = 4_000_000
+
+class TokenMatrix:
+    """
+    Разреженная бинарная матрица "товар каталога x токен", хранящаяся по
+    столбцам: для каждого токена - массив позиций товаров с этим токеном.
+
+    Для блока новых товаров размеры пересечений со всем каталогом
+    вычисляются одной операцией (разреженное произведение Q x C^T).
+    """
+    def __init__(self, postings: Dict[str, List[int]], sizes: List[int]):
+        self.vocabulary = {token: column for column, token in enumerate(postings)}
+        self.columns = [np.asarray(positions, dtype=np.int64) for positions in postings.values()]
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.rows = len(sizes)
+
+    def _block_columns(self, tokens: Set[str]) -> List[np.ndarray]:
+        columns = []
+        for token in tokens:
+            column = self.vocabulary.get(token)
+            if column is not None:
+                columns.append(self.columns[column])
+        return columns
+
+    def intersections(self, block: List[Set[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Ненулевые элементы произведения: номер товара в блоке, позиция в
+        каталоге и число общих токенов. Упорядочены по товару, затем по позиции.
+        """
+        parts = []
+        for row, tokens in enumerate(block):
+            for column in self._block_columns(tokens):
+                parts.append(column + row * self.rows)
+
+        if not parts:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty
+
+        keys, counts = np.unique(np.concatenate(parts), return_counts=True)
+        return keys // self.rows, keys % self.rows, counts
+
+    def jaccard_candidates(self, block: List[Set[str]], threshold: float,
+                           weights: Tuple[float, float, float]) -> List[List[int]]:
+        """
+        Для каждого товара блока - позиции каталога (по возрастанию), у которых
+        верхняя граница схожести по коэффициенту Жаккара достигает порога.
+
+        weights - (вес последовательности, вес Жаккара, бонус за характеристики);
+        граница считается в том же порядке операций, что и в чистом Python.
+        """
+        rows, positions, counts = self.intersections(block)
+        block_sizes = np.asarray([len(tokens) for tokens in block], dtype=np.int64)
+
+        jaccard = counts / (block_sizes[rows] + self.sizes[positions] - counts)
+        sequence_weight, jaccard_weight, specs_bonus = weights
+        bound = np.minimum(1.0, sequence_weight * 1.0 + jaccard_weight * jaccard + specs_bonus)
+
+        keep = bound >= threshold
+        rows, positions = rows[keep], positions[keep]
+        boundaries = np.searchsorted(rows, np.arange(len(block) + 1))
+        return [positions[boundaries[row]:boundaries[row + 1]].tolist() for row in range(len(block))]
+
+    def iter_candidates(self, token_sets: List[Set[str]], threshold: float,
+                        weights: Tuple[float, float, float], block_size: int) -> Iterator[List[int]]:
+        """
+        Разбивает товары на блоки не больше block_size товаров и
+        MAX_BLOCK_ENTRIES пар и выдаёт кандидатов по одному товару.
+        """
+        block = []
+        entries = 0
+        for tokens in token_sets:
+            size = sum(len(column) for column in self._block_columns(tokens))
+            if block and (len(block) >= block_size or entries + size > MAX_BLOCK_ENTRIES):
+                yield from self.jaccard_candidates(block, threshold, weights)
+                block, entries = [], 0
+            block.append(tokens)
+            entries += size
+        if block:
+            yield from self.jaccard_candidates(block, threshold, weights)